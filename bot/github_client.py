@@ -1,14 +1,50 @@
-import base64
+import asyncio
 import csv
 import io
-from datetime import datetime
-from typing import Dict, Iterable, Optional, Sequence, Tuple
+import json
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
 
-import requests
+import httpx
+
+try:
+    from pybase64 import b64decode, b64encode
+except ImportError:  # pragma: no cover - optional dependency
+    from base64 import b64decode, b64encode
+
+try:
+    from orjson import dumps as _json_dumps
+except ImportError:  # pragma: no cover - optional dependency
+
+    def _json_dumps(obj: object) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+# (header, rows as value tuples, row offsets, row -> last index) as returned by
+# GitHubCSVClient._parse_csv_indexed.
+_RowKey = Tuple[str, ...]
+_ParsedCSV = Tuple[list[str], list[_RowKey], list[Tuple[int, int]], Dict[_RowKey, int]]
+# Parsed versions of the file kept around, keyed by blob sha.
+_PARSE_CACHE_SIZE = 4
+_COMMIT_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+_JSON_HEADERS = {"Content-Type": "application/json"}
+# Transient gateway errors on GET are retried with exponential backoff. PUTs are
+# not retried: a retried write would fail the sha check if the first one landed.
+_GET_RETRIES = 3
+_GET_BACKOFF_FACTOR = 0.3
+_RETRY_STATUSES = frozenset({502, 503, 504})
+
+
+def _utc_timestamp() -> str:
+    return datetime.now(timezone.utc).strftime(_COMMIT_TIMESTAMP_FORMAT)
 
 
 class GitHubCSVClient:
-    """Lightweight helper that appends rows to a CSV file in a GitHub repo."""
+    """Lightweight async helper that appends rows to a CSV file in a GitHub repo.
+
+    Backed by a pooled httpx.AsyncClient so the bot talks to GitHub on its own
+    event loop. Operations are serialized with a lock so the GET/PUT pair of one
+    call never interleaves with another call's cache updates.
+    """
 
     def __init__(
         self,
@@ -22,32 +58,67 @@ class GitHubCSVClient:
         self.repo = repo
         self.file_path = file_path.strip("/")
         self.branch = branch
-        self._session = requests.Session()
-        self._session.headers.update(
-            {
-                "Authorization": f"Bearer {token}",
-                "Accept": "application/vnd.github+json",
-            }
+        self._headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+        }
+        # Last fetched version of the file, reused when GitHub answers 304.
+        self._etag: Optional[str] = None
+        self._cached_content: Optional[str] = None
+        self._cached_sha: Optional[str] = None
+        self._parse_cache: Dict[str, _ParsedCSV] = {}
+        # Every operation is a GET followed by a PUT on the same host, so keep the
+        # connections alive between calls.
+        self._client = httpx.AsyncClient(
+            headers=self._headers,
+            timeout=30,
+            transport=httpx.AsyncHTTPTransport(
+                retries=3,
+                limits=httpx.Limits(
+                    max_connections=4,
+                    max_keepalive_connections=4,
+                    keepalive_expiry=60,
+                ),
+            ),
         )
+        self._lock = asyncio.Lock()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
 
     # region public api
-    def append_row(self, header: Iterable[str], row: Dict[str, str]) -> None:
+    async def append_row(self, header: Iterable[str], row: Dict[str, str]) -> None:
         """Append a CSV row to the configured file (creating the file if needed)."""
-        existing_content, sha = self._fetch_file()
-        csv_payload = self._build_payload(existing_content, header, row)
-        self._put_file(csv_payload, sha)
+        async with self._lock:
+            if self._cached_sha:
+                # Optimistically write on top of the last known version; GitHub rejects
+                # the PUT with 409 if someone else changed the file in the meantime.
+                csv_payload = self._build_payload(self._cached_content, header, row)
+                try:
+                    await self._put_file(csv_payload, self._cached_sha)
+                    return
+                except httpx.HTTPStatusError as exc:
+                    # Whatever the reason, the cached version is suspect; the next
+                    # call starts again from a fresh GET.
+                    self._reset_cache()
+                    if exc.response.status_code != 409:
+                        raise
+            existing_content, sha = await self._fetch_file()
+            csv_payload = self._build_payload(existing_content, header, row)
+            await self._put_file(csv_payload, sha)
 
     # endregion
 
-    def read_rows(self) -> Tuple[Sequence[str], Sequence[Dict[str, str]]]:
+    async def read_rows(self) -> Tuple[Sequence[str], Sequence[Dict[str, str]]]:
         """Read the remote CSV into (header, rows)."""
-        content, _sha = self._fetch_file()
-        if not content:
-            return (), ()
-        header, rows = self._parse_csv(content)
-        return header, rows
+        async with self._lock:
+            content, sha = await self._fetch_file()
+            if not content:
+                return (), ()
+            header, rows, _spans, _index = self._parse_cached(content, sha)
+            return header, [dict(zip(header, row)) for row in rows]
 
-    def delete_matching_row(
+    async def delete_matching_row(
         self,
         row_fingerprint: Dict[str, str],
         *,
@@ -58,29 +129,31 @@ class GitHubCSVClient:
 
         Returns True if a row was found & deleted.
         """
-        content, sha = self._fetch_file()
-        if not content or not sha:
-            return False
-        header, rows = self._parse_csv(content)
-        index = self._locate_row(
-            rows,
-            row_fingerprint,
-            header=header,
-            preferred_index=preferred_index,
-        )
-        if index is None:
-            return False
-        del rows[index]
-        updated = self._serialize_csv(header, rows)
-        self._put_file(
-            updated,
-            sha,
-            message=commit_message
-            or f"chore: delete shift via bot at {datetime.utcnow().isoformat()}",
-        )
-        return True
+        async with self._lock:
+            content, sha = await self._fetch_file()
+            if not content or not sha:
+                return False
+            header, rows, spans, row_index = self._parse_cached(content, sha)
+            index = self._locate_row(
+                rows,
+                row_fingerprint,
+                header=header,
+                preferred_index=preferred_index,
+                row_index=row_index,
+            )
+            if index is None:
+                return False
+            start, end = spans[index]
+            updated = content[:start] + content[end:]
+            await self._put_file(
+                updated,
+                sha,
+                message=commit_message
+                or f"chore: delete shift via bot at {_utc_timestamp()}",
+            )
+            return True
 
-    def update_matching_row(
+    async def update_matching_row(
         self,
         row_fingerprint: Dict[str, str],
         updated_row: Dict[str, str],
@@ -92,38 +165,38 @@ class GitHubCSVClient:
 
         Returns True if a row was found & updated.
         """
-        content, sha = self._fetch_file()
-        if not content or not sha:
-            return False
-        header, rows = self._parse_csv(content)
-        index = self._locate_row(
-            rows,
-            row_fingerprint,
-            header=header,
-            preferred_index=preferred_index,
-        )
-        if index is None:
-            return False
-        rows[index] = {col: str(updated_row.get(col, "")) for col in header}
-        updated = self._serialize_csv(header, rows)
-        self._put_file(
-            updated,
-            sha,
-            message=commit_message
-            or f"chore: update shift via bot at {datetime.utcnow().isoformat()}",
-        )
-        return True
+        async with self._lock:
+            content, sha = await self._fetch_file()
+            if not content or not sha:
+                return False
+            header, rows, spans, row_index = self._parse_cached(content, sha)
+            index = self._locate_row(
+                rows,
+                row_fingerprint,
+                header=header,
+                preferred_index=preferred_index,
+                row_index=row_index,
+            )
+            if index is None:
+                return False
+            start, end = spans[index]
+            updated = content[:start] + self._serialize_row(header, updated_row) + content[end:]
+            await self._put_file(
+                updated,
+                sha,
+                message=commit_message
+                or f"chore: update shift via bot at {_utc_timestamp()}",
+            )
+            return True
 
-    def _fetch_file(self) -> tuple[Optional[str], Optional[str]]:
-        url = f"https://api.github.com/repos/{self.repo}/contents/{self.file_path}"
-        params = {"ref": self.branch}
-        response = self._session.get(url, params=params)
-        if response.status_code == 404:
-            return None, None
-        response.raise_for_status()
-        payload = response.json()
-        content = base64.b64decode(payload["content"]).decode("utf-8")
-        return content, payload["sha"]
+    @property
+    def _contents_url(self) -> str:
+        return f"https://api.github.com/repos/{self.repo}/contents/{self.file_path}"
+
+    def _reset_cache(self) -> None:
+        self._etag = None
+        self._cached_content = None
+        self._cached_sha = None
 
     def _build_payload(
         self,
@@ -131,95 +204,134 @@ class GitHubCSVClient:
         header: Iterable[str],
         row: Dict[str, str],
     ) -> str:
+        fieldnames = list(header)
+        # Only the new line goes through the writer; the existing body is reused as is.
         output = io.StringIO()
-        writer = _DictWriter(output, header)
+        writer = csv.writer(output, lineterminator="\n")
         if not existing_content:
-            writer.writeheader()
-        else:
-            output.write(existing_content.rstrip("\n"))
-            output.write("\n")
-        writer.writerow(row)
-        return output.getvalue()
+            writer.writerow(fieldnames)
+        writer.writerow([row.get(name, "") for name in fieldnames])
+        if not existing_content:
+            return output.getvalue()
+        separator = "" if existing_content.endswith("\n") else "\n"
+        return existing_content + separator + output.getvalue()
+
+    def _parse_cached(self, content: str, sha: Optional[str]) -> _ParsedCSV:
+        """Parse `content`, reusing the result when this sha was parsed recently."""
+        if sha is None:
+            return self._parse_csv_indexed(content)
+        parsed = self._parse_cache.pop(sha, None)
+        if parsed is None:
+            parsed = self._parse_csv_indexed(content)
+        self._parse_cache[sha] = parsed
+        if len(self._parse_cache) > _PARSE_CACHE_SIZE:
+            del self._parse_cache[next(iter(self._parse_cache))]
+        return parsed
 
     @staticmethod
-    def _parse_csv(content: str) -> Tuple[Sequence[str], list[Dict[str, str]]]:
-        stream = io.StringIO(content)
-        reader = csv.DictReader(stream)
-        header = list(reader.fieldnames or [])
-        rows: list[Dict[str, str]] = []
-        for row in reader:
-            if not row:
-                continue
-            normalized = {key: (value or "") for key, value in row.items()}
-            if not any(normalized.values()):
-                continue
-            rows.append(normalized)
-        return header, rows
+    def _parse_csv_indexed(content: str) -> _ParsedCSV:
+        """Parse the CSV and remember the (start, end) offsets of every row in `content`.
+
+        The offsets let callers splice a single row out of (or into) the original
+        text without re-serializing the rows they did not touch. Rows are kept as
+        tuples in header order (callers that need dicts build them), and the returned
+        index maps each tuple to the last row holding it.
+        """
+        consumed = 0
+
+        def lines() -> Iterator[str]:
+            nonlocal consumed
+            for line in io.StringIO(content, newline=""):
+                consumed += len(line)
+                yield line
+
+        reader = csv.reader(lines())
+        header = next(reader, None)
+        if header is None:
+            return [], [], [], {}
+        width = len(header)
+        rows: list[_RowKey] = []
+        spans: list[Tuple[int, int]] = []
+        row_index: Dict[_RowKey, int] = {}
+        start = consumed
+        for values in reader:
+            end = consumed
+            if any(values):
+                key = tuple(values[:width]) + ("",) * (width - len(values))
+                row_index[key] = len(rows)
+                rows.append(key)
+                spans.append((start, end))
+            start = end
+        return header, rows, spans, row_index
 
     @staticmethod
-    def _serialize_csv(header: Sequence[str], rows: Sequence[Dict[str, str]]) -> str:
+    def _serialize_row(header: Sequence[str], row: Dict[str, str]) -> str:
         output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=list(header), lineterminator="\n")
-        writer.writeheader()
-        for row in rows:
-            writer.writerow({col: row.get(col, "") for col in header})
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow([str(row.get(col, "")) for col in header])
         return output.getvalue()
 
     @staticmethod
     def _locate_row(
-        rows: Sequence[Dict[str, str]],
+        rows: Sequence[_RowKey],
         fingerprint: Dict[str, str],
         *,
         header: Sequence[str],
         preferred_index: Optional[int],
+        row_index: Dict[_RowKey, int],
     ) -> Optional[int]:
-        def matches(candidate: Dict[str, str]) -> bool:
-            return all(
-                (candidate.get(col, "") or "") == (fingerprint.get(col, "") or "")
-                for col in header
-            )
-
+        key = tuple(fingerprint.get(col, "") or "" for col in header)
         if preferred_index is not None and 0 <= preferred_index < len(rows):
-            if matches(rows[preferred_index]):
+            if rows[preferred_index] == key:
                 return preferred_index
+        return row_index.get(key)
+
+    async def _fetch_file(self) -> tuple[Optional[str], Optional[str]]:
+        params = {"ref": self.branch}
+        headers = {"If-None-Match": self._etag} if self._etag else None
+        response = await self._get_with_retry(self._contents_url, params=params, headers=headers)
+        if response.status_code == 304:
+            return self._cached_content, self._cached_sha
+        if response.status_code == 404:
+            self._reset_cache()
+            return None, None
+        response.raise_for_status()
+        payload = response.json()
+        content = b64decode(payload["content"]).decode("utf-8")
+        self._etag = response.headers.get("ETag")
+        self._cached_content = content
+        self._cached_sha = payload["sha"]
+        return content, payload["sha"]
 
-        for index in range(len(rows) - 1, -1, -1):
-            if matches(rows[index]):
-                return index
-        return None
+    async def _get_with_retry(self, url: str, **kwargs: object) -> httpx.Response:
+        # The transport's own retries only cover connection errors, not status codes.
+        for attempt in range(_GET_RETRIES):
+            response = await self._client.get(url, **kwargs)
+            if response.status_code not in _RETRY_STATUSES:
+                return response
+            await asyncio.sleep(_GET_BACKOFF_FACTOR * 2**attempt)
+        return await self._client.get(url, **kwargs)
 
-    def _put_file(self, content: str, sha: Optional[str], *, message: Optional[str] = None) -> None:
-        url = f"https://api.github.com/repos/{self.repo}/contents/{self.file_path}"
+    async def _put_file(
+        self, content: str, sha: Optional[str], *, message: Optional[str] = None
+    ) -> None:
         data = {
-            "message": message or f"chore: log shift via bot at {datetime.utcnow().isoformat()}",
-            "content": base64.b64encode(content.encode("utf-8")).decode("utf-8"),
+            "message": message or f"chore: log shift via bot at {_utc_timestamp()}",
+            "content": b64encode(content.encode("utf-8")).decode("utf-8"),
             "branch": self.branch,
         }
         if sha:
             data["sha"] = sha
-        response = self._session.put(url, json=data)
+        response = await self._client.put(
+            self._contents_url,
+            content=_json_dumps(data),
+            headers=_JSON_HEADERS,
+        )
         response.raise_for_status()
-
-
-class _DictWriter:
-    """Minimal CSV DictWriter to avoid bringing csv module state handling here."""
-
-    def __init__(self, stream: io.StringIO, fieldnames: Iterable[str]) -> None:
-        self.stream = stream
-        self.fieldnames = list(fieldnames)
-
-    def writeheader(self) -> None:
-        self.stream.write(",".join(self.fieldnames))
-        self.stream.write("\n")
-
-    def writerow(self, row: Dict[str, str]) -> None:
-        values = [self._escape(row.get(name, "")) for name in self.fieldnames]
-        self.stream.write(",".join(values))
-        self.stream.write("\n")
-
-    def _escape(self, value: str) -> str:
-        value = str(value)
-        if any(ch in value for ch in [",", '"', "\n"]):
-            escaped = value.replace('"', '""')
-            return f'"{escaped}"'
-        return value
+        # The PUT response carries the new blob sha; keep the content we just wrote
+        # so the next call does not need to download it again.
+        if sha:
+            self._parse_cache.pop(sha, None)
+        self._etag = None
+        self._cached_content = content
+        self._cached_sha = response.json()["content"]["sha"]
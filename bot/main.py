@@ -1,12 +1,16 @@
 import asyncio
+import functools
 import logging
 import os
 import re
-from datetime import date, datetime, timedelta
-from typing import Dict, Optional, Sequence, Tuple
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Awaitable, Dict, NamedTuple, Optional, Sequence, Tuple, TypeVar
+from urllib.parse import urlparse
 
-from telegram import ReplyKeyboardMarkup, ReplyKeyboardRemove, Update
+from telegram import Message, ReplyKeyboardMarkup, ReplyKeyboardRemove, Update
 from telegram.ext import (
+    Application,
     ApplicationBuilder,
     CommandHandler,
     ContextTypes,
@@ -40,11 +44,14 @@ TELEGRAM_TOKEN = os.environ.get("TELEGRAM_TOKEN", "")
 if not TELEGRAM_TOKEN:
     raise RuntimeError("Missing TELEGRAM_TOKEN env variable")
 
-ALLOWED_CHAT_IDS = {
-    chat_id.strip()
+# When set (e.g. https://example.com/telegram), updates arrive by webhook instead of polling.
+TELEGRAM_WEBHOOK_URL = os.environ.get("TELEGRAM_WEBHOOK_URL", "")
+
+ALLOWED_CHAT_IDS = frozenset(
+    int(chat_id.strip())
     for chat_id in os.environ.get("TELEGRAM_ALLOWED_CHAT_IDS", "").split(",")
     if chat_id.strip()
-}
+)
 
 GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN", "")
 GITHUB_REPO = os.environ.get("GITHUB_REPO", "")
@@ -59,19 +66,163 @@ GITHUB_CLIENT = GitHubCSVClient(
 )
 
 
-def _default_venue_keyboard() -> ReplyKeyboardMarkup:
-    return ReplyKeyboardMarkup(
-        [["Bee Night"]], one_time_keyboard=True, resize_keyboard=True
-    )
+# /ds reuses the last downloaded rows for a short while; past that window the
+# client revalidates with a conditional GET, so an unchanged file is not re-parsed.
+_ROWS_CACHE_TTL = 30.0
+_ROWS_CACHE: Dict[str, object] = {"loaded_at": None, "header": (), "rows": ()}
+_ROWS_CACHE_LOCK = asyncio.Lock()
 
 
-def _post_save_keyboard() -> ReplyKeyboardMarkup:
-    return ReplyKeyboardMarkup(
-        [["↩️ Hoàn tác ca vừa lưu", "🔁 Nhập ca mới"], ["🏁 Kết thúc"]],
-        one_time_keyboard=True,
-        resize_keyboard=True,
-    )
+async def _cached_read_rows() -> Tuple[Sequence[str], Sequence[Dict[str, str]]]:
+    async with _ROWS_CACHE_LOCK:
+        loaded_at = _ROWS_CACHE["loaded_at"]
+        now = time.monotonic()
+        if loaded_at is None or now - loaded_at >= _ROWS_CACHE_TTL:
+            header, rows = await GITHUB_CLIENT.read_rows()
+            _ROWS_CACHE.update(loaded_at=now, header=header, rows=rows)
+        return _ROWS_CACHE["header"], _ROWS_CACHE["rows"]
+
+
+def _invalidate_rows_cache() -> None:
+    _ROWS_CACHE["loaded_at"] = None
+
+
+def _splice_rows_cache(
+    fingerprint: Dict[str, str],
+    preferred_index: Optional[int],
+    replacement: Optional[Dict[str, object]],
+) -> None:
+    """Mirror a successful edit (or delete, when `replacement` is None) into the cache.
+
+    Falls back to invalidating when the cached rows do not contain the changed row.
+    """
+    if _ROWS_CACHE["loaded_at"] is None:
+        return
+    header = _ROWS_CACHE["header"]
+    rows = list(_ROWS_CACHE["rows"])
+    index = preferred_index
+    if index is None or not 0 <= index < len(rows) or rows[index] != fingerprint:
+        index = next(
+            (i for i in range(len(rows) - 1, -1, -1) if rows[i] == fingerprint), None
+        )
+    if index is None:
+        _invalidate_rows_cache()
+        return
+    if replacement is None:
+        del rows[index]
+    else:
+        rows[index] = {col: str(replacement.get(col, "")) for col in header}
+    _ROWS_CACHE.update(loaded_at=time.monotonic(), rows=rows)
 
+
+LABEL_TO_EVENT_KEY = {cfg["label"]: key for key, cfg in SHIFT_CONFIG.items()}
+EVENT_TYPES_TEXT = ", ".join(LABEL_TO_EVENT_KEY)
+
+_RELATIVE_DATE_MAP = {
+    "hôm nay": 0,
+    "hom nay": 0,
+    "ngày mai": 1,
+    "ngay mai": 1,
+    "hôm qua": -1,
+    "hom qua": -1,
+}
+_RELATIVE_DATE_PREFIXES = tuple(_RELATIVE_DATE_MAP)
+# DD/MM/YYYY or DD/MM/YY anywhere in the text (keyboard buttons wrap it in a label),
+# and a bare ISO YYYY-MM-DD.
+_DMY_RE = re.compile(r"(?<!\d)(\d{1,2})[/-](\d{1,2})[/-](\d{4}|\d{2})(?!\d)")
+_YMD_RE = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+_WHITESPACE_RE = re.compile(r"\s+")
+# H:MM / HH:MM, the same inputs strptime("%H:%M") accepts.
+_CLOCK_RE = re.compile(r"(\d{1,2}):(\d{1,2})")
+_NON_DIGIT_RE = re.compile(r"\D+")
+_INT_RE = re.compile(r"\d+")
+
+# Substring keywords recognised in free-text replies (with and without diacritics).
+_KW_DEM_NHAC = ("dem", "đêm")
+_KW_OUTSOURCED = ("thuê", "thue")
+_KW_EXIT = ("thoát", "thoat")
+_KW_LIST = ("danh sách", "danh sach")
+_KW_DELETE = ("xoá", "xoa")
+_KW_EDIT = ("sửa", "sua")
+_KW_BACK = ("quay lại", "quay lai")
+_KW_FIELD_DATE = ("ngày", "ngay")
+_KW_FIELD_VENUE = ("địa điểm", "dia diem")
+_KW_FIELD_EVENT = ("loại", "loai")
+_KW_FIELD_PERFORMER = ("người trực", "nguoi truc")
+_KW_FIELD_END_TIME = ("giờ", "gio")
+_KW_FIELD_PAYMENT = ("tiền thuê", "tien thue")
+_KW_SELF = ("trực tiếp", "tự làm", "toi truc", "tu lam", "tôi trực")
+_KW_CANCEL = ("huỷ", "huy")
+_KW_SAVE = ("lưu", "luu")
+_KW_CONTINUE = ("tiếp tục", "tiep tuc")
+_KW_UNDO = ("hoàn tác", "hoan tac")
+_KW_NEW = ("nhập", "nhap")
+_KW_FINISH = ("kết thúc", "ket thuc", "kết thuc")
+# The performer keywords are matched with one regex scan each instead of one
+# substring scan per keyword.
+_PERFORMER_SELF_RE = re.compile("|".join(map(re.escape, _KW_SELF)))
+_PERFORMER_OUT_RE = re.compile("|".join(map(re.escape, _KW_OUTSOURCED)))
+# PERFORMER_KEYBOARD buttons, lower-cased: taps resolve without any scan.
+_PERFORMER_BY_LABEL = {"trực tiếp": "self", "thuê người": "outsourced"}
+
+# Replies shared by several handlers.
+_MSG_EXITED = "Đã thoát /ds."
+_MSG_NOT_ALLOWED = "Xin lỗi, bot này chỉ dành cho chủ sở hữu."
+_MSG_SESSION_EXPIRED = "Phiên sửa đã hết hạn, gõ /ds để bắt đầu lại."
+_MSG_DELETE_CANCELLED = "Đã huỷ xoá. Bạn muốn làm gì?"
+_MSG_CHOOSE_PERFORMER = "Vui lòng chọn 'Trực tiếp' hoặc 'Thuê người'."
+_MSG_INVALID_EVENT = "Loại sự kiện không hợp lệ, thử lại nhé."
+_MSG_INVALID_TIME = "Giờ không hợp lệ. Ví dụ hợp lệ: 23:10"
+
+
+EVENT_KEYBOARD = ReplyKeyboardMarkup(
+    [[cfg["label"]] for cfg in SHIFT_CONFIG.values()],
+    one_time_keyboard=True,
+    resize_keyboard=True,
+)
+PERFORMER_KEYBOARD = ReplyKeyboardMarkup(
+    [["Trực tiếp", "Thuê người"]],
+    one_time_keyboard=True,
+    resize_keyboard=True,
+)
+OUTSOURCED_PAY_SET = frozenset(OUTSOURCED_PAY_CHOICES)
+PAYMENT_CHOICES_TEXT = ", ".join(f"{amount // 1000}k" for amount in OUTSOURCED_PAY_CHOICES)
+PAYMENT_KEYBOARD = ReplyKeyboardMarkup(
+    [[f"{amount // 1000}k"] for amount in OUTSOURCED_PAY_CHOICES],
+    one_time_keyboard=True,
+    resize_keyboard=True,
+)
+VENUE_KEYBOARD = ReplyKeyboardMarkup(
+    [["Bee Night"]], one_time_keyboard=True, resize_keyboard=True
+)
+POST_SAVE_KEYBOARD = ReplyKeyboardMarkup(
+    [["↩️ Hoàn tác ca vừa lưu", "🔁 Nhập ca mới"], ["🏁 Kết thúc"]],
+    one_time_keyboard=True,
+    resize_keyboard=True,
+)
+REMOVE_KEYBOARD = ReplyKeyboardRemove()
+DS_ACTION_KEYBOARD = ReplyKeyboardMarkup(
+    [["✏️ Sửa", "🗑️ Xoá"], ["⬅️ Danh sách", "🏁 Thoát"]],
+    one_time_keyboard=True,
+    resize_keyboard=True,
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _date_keyboard(today: date) -> ReplyKeyboardMarkup:
+    tomorrow = today + timedelta(days=1)
+    yesterday = today - timedelta(days=1)
+    keyboard = [
+        [f"📆 Hôm nay ({today.strftime('%d/%m/%Y')})"],
+        [
+            f"⏭️ Ngày mai ({tomorrow.strftime('%d/%m/%Y')})",
+            f"⏮️ Hôm qua ({yesterday.strftime('%d/%m/%Y')})",
+        ],
+    ]
+    return ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
+
+
+@functools.lru_cache(maxsize=None)
 def _ds_number_keyboard(count: int) -> ReplyKeyboardMarkup:
     numbers = [str(i) for i in range(1, count + 1)]
     rows = [numbers[i : i + 5] for i in range(0, len(numbers), 5)]
@@ -79,14 +230,7 @@ def _ds_number_keyboard(count: int) -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(rows, one_time_keyboard=True, resize_keyboard=True)
 
 
-def _ds_action_keyboard() -> ReplyKeyboardMarkup:
-    return ReplyKeyboardMarkup(
-        [["✏️ Sửa", "🗑️ Xoá"], ["⬅️ Danh sách", "🏁 Thoát"]],
-        one_time_keyboard=True,
-        resize_keyboard=True,
-    )
-
-
+@functools.lru_cache(maxsize=None)
 def _ds_edit_field_keyboard(*, allow_worker_payment: bool) -> ReplyKeyboardMarkup:
     rows = [
         ["🗓️ Ngày", "📍 Địa điểm"],
@@ -99,6 +243,7 @@ def _ds_edit_field_keyboard(*, allow_worker_payment: bool) -> ReplyKeyboardMarku
     return ReplyKeyboardMarkup(rows, one_time_keyboard=True, resize_keyboard=True)
 
 
+@functools.lru_cache(maxsize=None)
 def _confirm_keyboard(confirm_label: str) -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         [[confirm_label], ["❌ Huỷ"]],
@@ -108,16 +253,16 @@ def _confirm_keyboard(confirm_label: str) -> ReplyKeyboardMarkup:
 
 
 def _normalize_text(text: str) -> str:
-    return re.sub(r"\s+", " ", (text or "").strip().lower())
+    return _WHITESPACE_RE.sub(" ", (text or "").strip().lower())
 
 
 def _format_shift_list_item(index: int, row: Dict[str, str]) -> str:
-    date_label = row.get("date", "--")
-    event_type = row.get("event_type", "--")
-    venue = row.get("venue", "--")
-    end_time = row.get("actual_end_time") or row.get("scheduled_end_time") or "--"
-    total = row.get("total_pay", "--")
-    return f"{index}) {date_label} | {event_type} | {venue} | KT {end_time} | Tổng {total}"
+    # Rows from read_rows() always carry every CSV_HEADER column.
+    end_time = row["actual_end_time"] or row["scheduled_end_time"] or "--"
+    return (
+        f"{index}) {row['date'] or '--'} | {row['event_type'] or '--'} | {row['venue'] or '--'}"
+        f" | KT {end_time} | Tổng {row['total_pay'] or '--'}"
+    )
 
 
 def _format_shift_detail(row: Dict[str, str]) -> str:
@@ -135,51 +280,127 @@ def _format_shift_detail(row: Dict[str, str]) -> str:
     )
 
 
-def _event_label_to_key() -> Dict[str, str]:
-    return {_normalize_text(cfg["label"]): key for key, cfg in SHIFT_CONFIG.items()}
+_EVENT_LABEL_TO_KEY = {_normalize_text(cfg["label"]): key for key, cfg in SHIFT_CONFIG.items()}
+_SQUASHED_EVENT_LABEL_TO_KEY = {
+    label.replace(" ", ""): key for label, key in _EVENT_LABEL_TO_KEY.items()
+}
+
+
+_DS_ACTION_BY_LABEL = {
+    _normalize_text("⬅️ Danh sách"): "list",
+    _normalize_text("🗑️ Xoá"): "delete",
+    _normalize_text("✏️ Sửa"): "edit",
+}
+_DS_ACTION_KEYWORDS = ((_KW_LIST, "list"), (_KW_DELETE, "delete"), (_KW_EDIT, "edit"))
+_NEXT_ACTION_BY_LABEL = {
+    _normalize_text("↩️ Hoàn tác ca vừa lưu"): "undo",
+    _normalize_text("🔁 Nhập ca mới"): "new",
+    _normalize_text("🏁 Kết thúc"): "finish",
+}
+_NEXT_ACTION_KEYWORDS = ((_KW_UNDO, "undo"), (_KW_NEW, "new"), (_KW_FINISH, "finish"))
+_DS_EDIT_FIELD_BY_LABEL = {
+    _normalize_text("🗓️ Ngày"): "date",
+    _normalize_text("📍 Địa điểm"): "venue",
+    _normalize_text("🎟️ Loại sự kiện"): "event_type",
+    _normalize_text("👥 Người trực"): "performed_by",
+    _normalize_text("⏰ Giờ kết thúc"): "actual_end_time",
+    _normalize_text("💵 Tiền thuê"): "worker_payment",
+}
+_DS_EDIT_FIELD_KEYWORDS = (
+    (_KW_FIELD_DATE, "date"),
+    (_KW_FIELD_VENUE, "venue"),
+    (_KW_FIELD_EVENT, "event_type"),
+    (_KW_FIELD_PERFORMER, "performed_by"),
+    (_KW_FIELD_END_TIME, "actual_end_time"),
+    (_KW_FIELD_PAYMENT, "worker_payment"),
+)
+_DS_EDIT_FIELD_PROMPTS = {
+    "date": ("Nhập ngày (DD/MM/YYYY hoặc YYYY-MM-DD):", REMOVE_KEYBOARD),
+    "venue": ("Nhập địa điểm:", REMOVE_KEYBOARD),
+    "event_type": ("Chọn loại sự kiện:", EVENT_KEYBOARD),
+    "performed_by": ("Chọn người trực:", PERFORMER_KEYBOARD),
+    "actual_end_time": ("Nhập giờ kết thúc thực tế (HH:MM, ví dụ 23:45):", REMOVE_KEYBOARD),
+    "worker_payment": ("Chọn tiền thuê:", PAYMENT_KEYBOARD),
+}
+
+
+def _matches(text: str, keywords: Tuple[str, ...]) -> bool:
+    return any(keyword in text for keyword in keywords)
+
+
+def _lookup_choice(
+    text: str,
+    by_label: Dict[str, str],
+    keywords: Sequence[Tuple[Tuple[str, ...], str]],
+) -> Optional[str]:
+    """Map a normalized reply to a choice: exact button label first, then keywords."""
+    choice = by_label.get(text)
+    if choice is None:
+        choice = next((value for kws, value in keywords if _matches(text, kws)), None)
+    return choice
+
+
+def _parse_performer(text: str) -> Optional[str]:
+    """Map a normalized reply to "self" / "outsourced", or None if unrecognised."""
+    performer = _PERFORMER_BY_LABEL.get(text)
+    if performer is None:
+        if _PERFORMER_SELF_RE.search(text):
+            performer = "self"
+        elif _PERFORMER_OUT_RE.search(text):
+            performer = "outsourced"
+    return performer
 
 
 def _infer_event_type_key(label: str) -> Optional[str]:
     normalized = _normalize_text(label)
-    mapping = _event_label_to_key()
-    if normalized in mapping:
-        return mapping[normalized]
+    if normalized in _EVENT_LABEL_TO_KEY:
+        return _EVENT_LABEL_TO_KEY[normalized]
     squashed = normalized.replace(" ", "")
-    for key_label, key in mapping.items():
-        if squashed == key_label.replace(" ", ""):
-            return key
+    if squashed in _SQUASHED_EVENT_LABEL_TO_KEY:
+        return _SQUASHED_EVENT_LABEL_TO_KEY[squashed]
     if "open" in normalized:
         return "openmic"
-    if "dem" in normalized or "đêm" in normalized:
+    if _matches(normalized, _KW_DEM_NHAC):
         return "dem_nhac"
     return None
 
 
 def _row_to_shift_form(row: Dict[str, str]) -> Optional[Dict[str, object]]:
-    raw_date = (row.get("date") or "").strip()
-    parsed_date: Optional[date] = None
-    if raw_date:
-        try:
-            parsed_date = datetime.strptime(raw_date, "%Y-%m-%d").date()
-        except ValueError:
-            parsed_date = _parse_event_date(raw_date)
+    form = _parse_shift_row(
+        (row.get("date") or "").strip(),
+        (row.get("venue") or "").strip(),
+        row.get("event_type", ""),
+        row.get("performed_by", ""),
+        (row.get("actual_end_time") or row.get("scheduled_end_time") or "").strip(),
+        (row.get("worker_payment") or "0").strip(),
+    )
+    # The cached dict is shared; callers edit their own copy.
+    return dict(form) if form else None
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_shift_row(
+    raw_date: str,
+    venue: str,
+    event_type: str,
+    performed_by: str,
+    end_raw: str,
+    worker_payment_raw: str,
+) -> Optional[Dict[str, object]]:
+    parsed_date = _parse_event_date(raw_date) if raw_date else None
     if not parsed_date:
         return None
 
-    event_key = _infer_event_type_key(row.get("event_type", ""))
+    event_key = _infer_event_type_key(event_type)
     if not event_key:
         return None
 
-    performed_by_raw = _normalize_text(row.get("performed_by", ""))
-    performer = "outsourced" if ("thuê" in performed_by_raw or "thue" in performed_by_raw) else "self"
+    performer = "outsourced" if _PERFORMER_OUT_RE.search(_normalize_text(performed_by)) else "self"
 
-    end_raw = (row.get("actual_end_time") or row.get("scheduled_end_time") or "").strip()
-    try:
-        end_time = datetime.strptime(end_raw, "%H:%M").time()
-    except ValueError:
+    end_time = _parse_clock(end_raw)
+    if end_time is None:
         return None
 
-    worker_payment_raw = (row.get("worker_payment") or "0").strip()
     try:
         worker_payment = int(float(worker_payment_raw))
     except ValueError:
@@ -189,7 +410,7 @@ def _row_to_shift_form(row: Dict[str, str]) -> Optional[Dict[str, object]]:
 
     return {
         "date": parsed_date,
-        "venue": (row.get("venue") or "").strip(),
+        "venue": venue,
         "event_type": event_key,
         "performed_by": performer,
         "actual_end_time": end_time,
@@ -197,211 +418,185 @@ def _row_to_shift_form(row: Dict[str, str]) -> Optional[Dict[str, object]]:
     }
 
 
+_T = TypeVar("_T")
+
+
+class _DsEntry(NamedTuple):
+    """One numbered shift offered by /ds."""
+
+    number: int
+    preferred_index: int
+    fingerprint: Dict[str, str]
+    snapshot: Dict[str, str]
+
+
+async def _with_ack(message: Message, text: str, operation: Awaitable[_T]) -> _T:
+    """Send the "please wait" reply while `operation` runs instead of before it.
+
+    The ack is always awaited before returning or raising, so later replies keep
+    their order. A failed ack is only logged: the caller sees the outcome of
+    `operation` alone.
+    """
+    ack = asyncio.create_task(message.reply_text(text))
+    try:
+        return await operation
+    finally:
+        try:
+            await ack
+        except Exception as exc:
+            logger.exception("Không thể gửi tin nhắn chờ: %s", exc)
+
+
 async def ds_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    message = update.message
     if not _ensure_allowed(update):
-        await update.message.reply_text("Xin lỗi, bot này chỉ dành cho chủ sở hữu.")
+        await message.reply_text(_MSG_NOT_ALLOWED)
         return ConversationHandler.END
-    await update.message.reply_text("Đang tải danh sách ca gần nhất... ⏳")
+    await message.reply_text("Đang tải danh sách ca gần nhất... ⏳")
     try:
-        header, rows = await asyncio.to_thread(GITHUB_CLIENT.read_rows)
+        header, rows = await _cached_read_rows()
     except Exception as exc:  # pragma: no cover - network code
         logger.exception("Không thể tải CSV: %s", exc)
-        await update.message.reply_text(
+        await message.reply_text(
             "Không thể tải dữ liệu từ GitHub, thử lại sau nhé.",
-            reply_markup=ReplyKeyboardRemove(),
+            reply_markup=REMOVE_KEYBOARD,
         )
         return ConversationHandler.END
 
     if not rows:
-        await update.message.reply_text(
+        await message.reply_text(
             "Chưa có dữ liệu trong file shifts.csv.",
-            reply_markup=ReplyKeyboardRemove(),
+            reply_markup=REMOVE_KEYBOARD,
         )
         return ConversationHandler.END
 
     total = len(rows)
     count = min(DS_PAGE_SIZE, total)
-    entries = []
-    lines = ["📋 10 ca gần nhất (mới → cũ):"]
-    for number in range(1, count + 1):
-        row_index = total - number
-        row = rows[row_index]
-        fingerprint = {col: row.get(col, "") for col in header}
-        entries.append(
-            {
-                "number": number,
-                "preferred_index": row_index,
-                "fingerprint": fingerprint,
-                "snapshot": row,
-            }
-        )
-        lines.append(_format_shift_list_item(number, row))
+    # Rows already carry exactly the header columns and are never mutated, so the
+    # same dict serves as both the match fingerprint and the display snapshot.
+    entries = [
+        _DsEntry(number, total - number, row, row)
+        for number, row in enumerate(reversed(rows[total - count :]), start=1)
+    ]
+    listing = "\n".join(
+        ["📋 10 ca gần nhất (mới → cũ):"]
+        + [_format_shift_list_item(entry.number, entry.snapshot) for entry in entries]
+    )
 
     context.user_data["ds_session"] = {
         "header": list(header),
         "entries": entries,
         "selected": None,
     }
-    await update.message.reply_text(
-        "\n".join(lines),
+    await message.reply_text(
+        listing,
         reply_markup=_ds_number_keyboard(count),
     )
     return DS_CHOOSE
 
 
 async def ds_choose(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    text = _normalize_text(update.message.text or "")
-    if "thoát" in text or "thoat" in text:
+    message = update.message
+    text = _normalize_text(message.text or "")
+    if _matches(text, _KW_EXIT):
         context.user_data.pop("ds_session", None)
-        await update.message.reply_text("Đã thoát /ds.", reply_markup=ReplyKeyboardRemove())
+        await message.reply_text(_MSG_EXITED, reply_markup=REMOVE_KEYBOARD)
         return ConversationHandler.END
 
     session = context.user_data.get("ds_session") or {}
     entries = session.get("entries") or []
-    try:
-        chosen = int(text)
-    except ValueError:
-        await update.message.reply_text("Vui lòng chọn số (1-10) hoặc bấm Thoát.")
+    if not _INT_RE.fullmatch(text):
+        await message.reply_text("Vui lòng chọn số (1-10) hoặc bấm Thoát.")
         return DS_CHOOSE
 
+    chosen = int(text)
     if chosen < 1 or chosen > len(entries):
-        await update.message.reply_text("Số không hợp lệ, thử lại nhé.")
+        await message.reply_text("Số không hợp lệ, thử lại nhé.")
         return DS_CHOOSE
 
     selected = entries[chosen - 1]
     session["selected"] = selected
-    context.user_data["ds_session"] = session
-    await update.message.reply_text(
-        _format_shift_detail(selected["snapshot"]),
-        reply_markup=_ds_action_keyboard(),
+    await message.reply_text(
+        _format_shift_detail(selected.snapshot),
+        reply_markup=DS_ACTION_KEYBOARD,
     )
     return DS_ACTION
 
 
 async def ds_action(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    text = _normalize_text(update.message.text or "")
-    if "thoát" in text or "thoat" in text:
+    message = update.message
+    text = _normalize_text(message.text or "")
+    if _matches(text, _KW_EXIT):
         context.user_data.pop("ds_session", None)
-        await update.message.reply_text("Đã thoát /ds.", reply_markup=ReplyKeyboardRemove())
+        await message.reply_text(_MSG_EXITED, reply_markup=REMOVE_KEYBOARD)
         return ConversationHandler.END
 
     session = context.user_data.get("ds_session") or {}
     selected = session.get("selected")
     if not selected:
-        await update.message.reply_text("Bạn hãy chọn 1 ca trước.", reply_markup=ReplyKeyboardRemove())
+        await message.reply_text("Bạn hãy chọn 1 ca trước.", reply_markup=REMOVE_KEYBOARD)
         return ConversationHandler.END
 
-    if "danh sách" in text or "danh sach" in text:
+    action = _lookup_choice(text, _DS_ACTION_BY_LABEL, _DS_ACTION_KEYWORDS)
+    if action == "list":
         return await ds_start(update, context)
 
-    if "xoá" in text or "xoa" in text:
-        await update.message.reply_text(
+    if action == "delete":
+        await message.reply_text(
             "⚠️ Bạn sắp xoá ca này.\n"
             "Bước 1/2: bấm '➡️ Tiếp tục xoá' để tiếp tục hoặc 'Huỷ' để dừng.",
             reply_markup=_confirm_keyboard("➡️ Tiếp tục xoá"),
         )
         return DS_DELETE_CONFIRM_1
 
-    if "sửa" in text or "sua" in text:
-        form = _row_to_shift_form(selected["snapshot"])
+    if action == "edit":
+        form = _row_to_shift_form(selected.snapshot)
         if not form:
-            await update.message.reply_text(
+            await message.reply_text(
                 "Không thể đọc dữ liệu ca này để sửa (định dạng không hợp lệ). "
                 "Bạn có thể kiểm tra lại file CSV.",
-                reply_markup=_ds_action_keyboard(),
+                reply_markup=DS_ACTION_KEYBOARD,
             )
             return DS_ACTION
         session["edit_form"] = form
         session.pop("updated_row", None)
-        context.user_data["ds_session"] = session
         allow_worker_payment = form.get("performed_by") == "outsourced"
-        await update.message.reply_text(
+        await message.reply_text(
             "Chọn trường bạn muốn sửa:",
             reply_markup=_ds_edit_field_keyboard(allow_worker_payment=allow_worker_payment),
         )
         return DS_EDIT_FIELD
 
-    await update.message.reply_text("Vui lòng chọn Sửa, Xoá, Danh sách hoặc Thoát.")
+    await message.reply_text("Vui lòng chọn Sửa, Xoá, Danh sách hoặc Thoát.")
     return DS_ACTION
 
 
 async def ds_edit_field(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    text = _normalize_text(update.message.text or "")
-    if "thoát" in text or "thoat" in text:
+    message = update.message
+    text = _normalize_text(message.text or "")
+    if _matches(text, _KW_EXIT):
         context.user_data.pop("ds_session", None)
-        await update.message.reply_text("Đã thoát /ds.", reply_markup=ReplyKeyboardRemove())
+        await message.reply_text(_MSG_EXITED, reply_markup=REMOVE_KEYBOARD)
         return ConversationHandler.END
-    if "quay lại" in text or "quay lai" in text:
-        await update.message.reply_text("Bạn muốn làm gì?", reply_markup=_ds_action_keyboard())
+    if _matches(text, _KW_BACK):
+        await message.reply_text("Bạn muốn làm gì?", reply_markup=DS_ACTION_KEYBOARD)
         return DS_ACTION
 
     session = context.user_data.get("ds_session") or {}
     form = session.get("edit_form")
     if not form:
-        await update.message.reply_text("Phiên sửa đã hết hạn, gõ /ds để bắt đầu lại.")
+        await message.reply_text(_MSG_SESSION_EXPIRED)
         return ConversationHandler.END
 
     allow_worker_payment = form.get("performed_by") == "outsourced"
-    if "ngày" in text or "ngay" in text:
-        session["edit_field"] = "date"
-        context.user_data["ds_session"] = session
-        await update.message.reply_text(
-            "Nhập ngày (DD/MM/YYYY hoặc YYYY-MM-DD):",
-            reply_markup=ReplyKeyboardRemove(),
-        )
-        return DS_EDIT_VALUE
-    if "địa điểm" in text or "dia diem" in text:
-        session["edit_field"] = "venue"
-        context.user_data["ds_session"] = session
-        await update.message.reply_text(
-            "Nhập địa điểm:",
-            reply_markup=ReplyKeyboardRemove(),
-        )
-        return DS_EDIT_VALUE
-    if "loại" in text or "loai" in text:
-        session["edit_field"] = "event_type"
-        context.user_data["ds_session"] = session
-        keyboard = [[cfg["label"]] for cfg in SHIFT_CONFIG.values()]
-        await update.message.reply_text(
-            "Chọn loại sự kiện:",
-            reply_markup=ReplyKeyboardMarkup(
-                keyboard, one_time_keyboard=True, resize_keyboard=True
-            ),
-        )
-        return DS_EDIT_VALUE
-    if "người trực" in text or "nguoi truc" in text:
-        session["edit_field"] = "performed_by"
-        context.user_data["ds_session"] = session
-        await update.message.reply_text(
-            "Chọn người trực:",
-            reply_markup=ReplyKeyboardMarkup(
-                [["Trực tiếp", "Thuê người"]],
-                one_time_keyboard=True,
-                resize_keyboard=True,
-            ),
-        )
-        return DS_EDIT_VALUE
-    if "giờ" in text or "gio" in text:
-        session["edit_field"] = "actual_end_time"
-        context.user_data["ds_session"] = session
-        await update.message.reply_text(
-            "Nhập giờ kết thúc thực tế (HH:MM, ví dụ 23:45):",
-            reply_markup=ReplyKeyboardRemove(),
-        )
-        return DS_EDIT_VALUE
-    if ("tiền thuê" in text or "tien thue" in text) and allow_worker_payment:
-        session["edit_field"] = "worker_payment"
-        context.user_data["ds_session"] = session
-        keyboard = [[f"{amount // 1000}k"] for amount in OUTSOURCED_PAY_CHOICES]
-        await update.message.reply_text(
-            "Chọn tiền thuê:",
-            reply_markup=ReplyKeyboardMarkup(
-                keyboard, one_time_keyboard=True, resize_keyboard=True
-            ),
-        )
+    field = _lookup_choice(text, _DS_EDIT_FIELD_BY_LABEL, _DS_EDIT_FIELD_KEYWORDS)
+    if field is not None and (field != "worker_payment" or allow_worker_payment):
+        prompt, keyboard = _DS_EDIT_FIELD_PROMPTS[field]
+        session["edit_field"] = field
+        await message.reply_text(prompt, reply_markup=keyboard)
         return DS_EDIT_VALUE
 
-    await update.message.reply_text(
+    await message.reply_text(
         "Trường không hợp lệ, thử lại nhé.",
         reply_markup=_ds_edit_field_keyboard(allow_worker_payment=allow_worker_payment),
     )
@@ -409,11 +604,12 @@ async def ds_edit_field(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
 
 
 async def ds_edit_value(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    raw = (update.message.text or "").strip()
+    message = update.message
+    raw = (message.text or "").strip()
     text = _normalize_text(raw)
-    if "thoát" in text or "thoat" in text:
+    if _matches(text, _KW_EXIT):
         context.user_data.pop("ds_session", None)
-        await update.message.reply_text("Đã thoát /ds.", reply_markup=ReplyKeyboardRemove())
+        await message.reply_text(_MSG_EXITED, reply_markup=REMOVE_KEYBOARD)
         return ConversationHandler.END
 
     session = context.user_data.get("ds_session") or {}
@@ -421,67 +617,56 @@ async def ds_edit_value(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     field = session.get("edit_field")
     selected = session.get("selected")
     if not form or not field or not selected:
-        await update.message.reply_text("Phiên sửa đã hết hạn, gõ /ds để bắt đầu lại.")
+        await message.reply_text(_MSG_SESSION_EXPIRED)
         return ConversationHandler.END
 
     if field == "date":
         parsed = _parse_event_date(raw)
         if not parsed:
-            await update.message.reply_text("Ngày không hợp lệ. Ví dụ: 12/06/2024 hoặc 2024-06-12.")
+            await message.reply_text("Ngày không hợp lệ. Ví dụ: 12/06/2024 hoặc 2024-06-12.")
             return DS_EDIT_VALUE
         form["date"] = parsed
     elif field == "venue":
         if not raw.strip():
-            await update.message.reply_text("Địa điểm không được để trống.")
+            await message.reply_text("Địa điểm không được để trống.")
             return DS_EDIT_VALUE
         form["venue"] = raw.strip()
     elif field == "event_type":
-        label_to_key = {cfg["label"]: key for key, cfg in SHIFT_CONFIG.items()}
-        chosen_label = raw.strip()
-        if chosen_label not in label_to_key:
-            await update.message.reply_text("Loại sự kiện không hợp lệ, thử lại nhé.")
+        event_key = LABEL_TO_EVENT_KEY.get(raw.strip())
+        if event_key is None:
+            await message.reply_text(_MSG_INVALID_EVENT)
             return DS_EDIT_VALUE
-        form["event_type"] = label_to_key[chosen_label]
+        form["event_type"] = event_key
     elif field == "performed_by":
-        normalized = text.replace("’", "'")
-        if any(keyword in normalized for keyword in ("trực tiếp", "tự làm", "toi truc", "tu lam", "tôi trực")):
+        performer = _parse_performer(text)
+        if performer == "self":
             form["performed_by"] = "self"
             form["worker_payment"] = 0
-        elif "thuê" in normalized or "thue" in normalized:
+        elif performer == "outsourced":
             form["performed_by"] = "outsourced"
             session["edit_field"] = "worker_payment"
-            context.user_data["ds_session"] = session
-            keyboard = [[f"{amount // 1000}k"] for amount in OUTSOURCED_PAY_CHOICES]
-            await update.message.reply_text(
+            await message.reply_text(
                 "Chọn tiền thuê:",
-                reply_markup=ReplyKeyboardMarkup(
-                    keyboard, one_time_keyboard=True, resize_keyboard=True
-                ),
+                reply_markup=PAYMENT_KEYBOARD,
             )
             return DS_EDIT_VALUE
         else:
-            await update.message.reply_text("Vui lòng chọn 'Trực tiếp' hoặc 'Thuê người'.")
+            await message.reply_text(_MSG_CHOOSE_PERFORMER)
             return DS_EDIT_VALUE
     elif field == "worker_payment":
-        digits = "".join(ch for ch in raw.lower() if ch.isdigit())
-        try:
-            amount = int(digits) * (1000 if len(digits) <= 3 else 1)
-        except ValueError:
-            amount = -1
-        if amount not in OUTSOURCED_PAY_CHOICES:
-            pretty = ", ".join(f"{val // 1000}k" for val in OUTSOURCED_PAY_CHOICES)
-            await update.message.reply_text(f"Vui lòng chọn một trong các mức: {pretty}")
+        amount = _parse_payment(raw)
+        if amount is None:
+            await message.reply_text(f"Vui lòng chọn một trong các mức: {PAYMENT_CHOICES_TEXT}")
             return DS_EDIT_VALUE
         form["worker_payment"] = amount
     elif field == "actual_end_time":
-        try:
-            end_time = datetime.strptime(raw.strip(), "%H:%M").time()
-        except ValueError:
-            await update.message.reply_text("Giờ không hợp lệ. Ví dụ hợp lệ: 23:10")
+        end_time = _parse_clock(raw)
+        if end_time is None:
+            await message.reply_text(_MSG_INVALID_TIME)
             return DS_EDIT_VALUE
         form["actual_end_time"] = end_time
     else:
-        await update.message.reply_text("Trường sửa không hợp lệ, gõ /ds để bắt đầu lại.")
+        await message.reply_text("Trường sửa không hợp lệ, gõ /ds để bắt đầu lại.")
         return ConversationHandler.END
 
     payload = ShiftPayload(
@@ -495,9 +680,8 @@ async def ds_edit_value(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     updated_row = payload.compute()
     session["edit_form"] = form
     session["updated_row"] = updated_row
-    context.user_data["ds_session"] = session
-    before = selected["snapshot"]
-    await update.message.reply_text(
+    before = selected.snapshot
+    await message.reply_text(
         "Xem lại thay đổi:\n"
         f"• Trước: {before.get('date','--')} | {before.get('event_type','--')} | {before.get('venue','--')} | KT {before.get('actual_end_time','--')}\n"
         f"• Sau:   {updated_row.get('date','--')} | {updated_row.get('event_type','--')} | {updated_row.get('venue','--')} | KT {updated_row.get('actual_end_time','--')}\n\n"
@@ -508,83 +692,89 @@ async def ds_edit_value(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
 
 
 async def ds_edit_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    text = _normalize_text(update.message.text or "")
-    if "thoát" in text or "thoat" in text:
+    message = update.message
+    text = _normalize_text(message.text or "")
+    if _matches(text, _KW_EXIT):
         context.user_data.pop("ds_session", None)
-        await update.message.reply_text("Đã thoát /ds.", reply_markup=ReplyKeyboardRemove())
+        await message.reply_text(_MSG_EXITED, reply_markup=REMOVE_KEYBOARD)
         return ConversationHandler.END
 
     session = context.user_data.get("ds_session") or {}
     selected = session.get("selected")
     updated_row = session.get("updated_row")
     if not selected or not updated_row:
-        await update.message.reply_text("Phiên sửa đã hết hạn, gõ /ds để bắt đầu lại.")
+        await message.reply_text(_MSG_SESSION_EXPIRED)
         return ConversationHandler.END
 
-    if "huỷ" in text or "huy" in text:
+    if _matches(text, _KW_CANCEL):
         session.pop("updated_row", None)
         session.pop("edit_field", None)
-        context.user_data["ds_session"] = session
-        await update.message.reply_text("Đã huỷ thay đổi. Bạn muốn làm gì?", reply_markup=_ds_action_keyboard())
+        await message.reply_text("Đã huỷ thay đổi. Bạn muốn làm gì?", reply_markup=DS_ACTION_KEYBOARD)
         return DS_ACTION
 
-    if "lưu" not in text and "luu" not in text:
-        await update.message.reply_text(
+    if not _matches(text, _KW_SAVE):
+        await message.reply_text(
             "Vui lòng bấm '✅ Lưu thay đổi' hoặc 'Huỷ'.",
             reply_markup=_confirm_keyboard("✅ Lưu thay đổi"),
         )
         return DS_EDIT_CONFIRM
 
-    await update.message.reply_text("Đang cập nhật dữ liệu, vui lòng chờ... ⏳")
-    fingerprint = selected["fingerprint"]
-    preferred_index = selected.get("preferred_index")
+    fingerprint = selected.fingerprint
+    preferred_index = selected.preferred_index
     try:
-        updated = await asyncio.to_thread(
-            GITHUB_CLIENT.update_matching_row,
-            fingerprint,
-            updated_row,
-            preferred_index=preferred_index,
+        updated = await _with_ack(
+            message,
+            "Đang cập nhật dữ liệu, vui lòng chờ... ⏳",
+            GITHUB_CLIENT.update_matching_row(
+                fingerprint,
+                updated_row,
+                preferred_index=preferred_index,
+            ),
         )
     except Exception as exc:  # pragma: no cover - network code
+        _invalidate_rows_cache()
         logger.exception("Không thể cập nhật dữ liệu: %s", exc)
-        await update.message.reply_text(
+        await message.reply_text(
             "Có lỗi khi cập nhật dữ liệu lên GitHub, thử lại sau nhé.",
-            reply_markup=_ds_action_keyboard(),
+            reply_markup=DS_ACTION_KEYBOARD,
         )
         return DS_ACTION
 
     if not updated:
-        await update.message.reply_text(
+        _invalidate_rows_cache()
+        await message.reply_text(
             "Không tìm thấy dòng cần sửa (có thể file đã thay đổi). Vui lòng gõ /ds để tải lại danh sách.",
-            reply_markup=ReplyKeyboardRemove(),
+            reply_markup=REMOVE_KEYBOARD,
         )
         context.user_data.pop("ds_session", None)
         return ConversationHandler.END
 
-    await update.message.reply_text("✅ Đã cập nhật.")
+    _splice_rows_cache(fingerprint, preferred_index, updated_row)
+    await message.reply_text("✅ Đã cập nhật.")
     context.user_data.pop("ds_session", None)
     return await ds_start(update, context)
 
 
 async def ds_delete_confirm_1(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    text = _normalize_text(update.message.text or "")
-    if "thoát" in text or "thoat" in text:
+    message = update.message
+    text = _normalize_text(message.text or "")
+    if _matches(text, _KW_EXIT):
         context.user_data.pop("ds_session", None)
-        await update.message.reply_text("Đã thoát /ds.", reply_markup=ReplyKeyboardRemove())
+        await message.reply_text(_MSG_EXITED, reply_markup=REMOVE_KEYBOARD)
         return ConversationHandler.END
 
-    if "huỷ" in text or "huy" in text:
-        await update.message.reply_text("Đã huỷ xoá. Bạn muốn làm gì?", reply_markup=_ds_action_keyboard())
+    if _matches(text, _KW_CANCEL):
+        await message.reply_text(_MSG_DELETE_CANCELLED, reply_markup=DS_ACTION_KEYBOARD)
         return DS_ACTION
 
-    if "tiếp tục" not in text and "tiep tuc" not in text:
-        await update.message.reply_text(
+    if not _matches(text, _KW_CONTINUE):
+        await message.reply_text(
             "Vui lòng bấm '➡️ Tiếp tục xoá' hoặc 'Huỷ'.",
             reply_markup=_confirm_keyboard("➡️ Tiếp tục xoá"),
         )
         return DS_DELETE_CONFIRM_1
 
-    await update.message.reply_text(
+    await message.reply_text(
         "⚠️ Bước 2/2: bấm '✅ Xoá vĩnh viễn' để xoá hoặc 'Huỷ' để dừng.",
         reply_markup=_confirm_keyboard("✅ Xoá vĩnh viễn"),
     )
@@ -592,55 +782,61 @@ async def ds_delete_confirm_1(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 
 async def ds_delete_confirm_2(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    text = _normalize_text(update.message.text or "")
-    if "thoát" in text or "thoat" in text:
+    message = update.message
+    text = _normalize_text(message.text or "")
+    if _matches(text, _KW_EXIT):
         context.user_data.pop("ds_session", None)
-        await update.message.reply_text("Đã thoát /ds.", reply_markup=ReplyKeyboardRemove())
+        await message.reply_text(_MSG_EXITED, reply_markup=REMOVE_KEYBOARD)
         return ConversationHandler.END
 
     session = context.user_data.get("ds_session") or {}
     selected = session.get("selected")
     if not selected:
-        await update.message.reply_text("Phiên xoá đã hết hạn, gõ /ds để bắt đầu lại.")
+        await message.reply_text("Phiên xoá đã hết hạn, gõ /ds để bắt đầu lại.")
         return ConversationHandler.END
 
-    if "huỷ" in text or "huy" in text:
-        await update.message.reply_text("Đã huỷ xoá. Bạn muốn làm gì?", reply_markup=_ds_action_keyboard())
+    if _matches(text, _KW_CANCEL):
+        await message.reply_text(_MSG_DELETE_CANCELLED, reply_markup=DS_ACTION_KEYBOARD)
         return DS_ACTION
 
-    if "xoá" not in text and "xoa" not in text:
-        await update.message.reply_text(
+    if not _matches(text, _KW_DELETE):
+        await message.reply_text(
             "Vui lòng bấm '✅ Xoá vĩnh viễn' hoặc 'Huỷ'.",
             reply_markup=_confirm_keyboard("✅ Xoá vĩnh viễn"),
         )
         return DS_DELETE_CONFIRM_2
 
-    await update.message.reply_text("Đang xoá dữ liệu, vui lòng chờ... ⏳")
-    fingerprint = selected["fingerprint"]
-    preferred_index = selected.get("preferred_index")
+    fingerprint = selected.fingerprint
+    preferred_index = selected.preferred_index
     try:
-        deleted = await asyncio.to_thread(
-            GITHUB_CLIENT.delete_matching_row,
-            fingerprint,
-            preferred_index=preferred_index,
+        deleted = await _with_ack(
+            message,
+            "Đang xoá dữ liệu, vui lòng chờ... ⏳",
+            GITHUB_CLIENT.delete_matching_row(
+                fingerprint,
+                preferred_index=preferred_index,
+            ),
         )
     except Exception as exc:  # pragma: no cover - network code
+        _invalidate_rows_cache()
         logger.exception("Không thể xoá dữ liệu: %s", exc)
-        await update.message.reply_text(
+        await message.reply_text(
             "Có lỗi khi xoá dữ liệu trên GitHub, thử lại sau nhé.",
-            reply_markup=_ds_action_keyboard(),
+            reply_markup=DS_ACTION_KEYBOARD,
         )
         return DS_ACTION
 
     if not deleted:
-        await update.message.reply_text(
+        _invalidate_rows_cache()
+        await message.reply_text(
             "Không tìm thấy dòng cần xoá (có thể file đã thay đổi). Vui lòng gõ /ds để tải lại danh sách.",
-            reply_markup=ReplyKeyboardRemove(),
+            reply_markup=REMOVE_KEYBOARD,
         )
         context.user_data.pop("ds_session", None)
         return ConversationHandler.END
 
-    await update.message.reply_text("✅ Đã xoá.")
+    _splice_rows_cache(fingerprint, preferred_index, None)
+    await message.reply_text("✅ Đã xoá.")
     context.user_data.pop("ds_session", None)
     return await ds_start(update, context)
 
@@ -648,7 +844,7 @@ async def ds_delete_confirm_2(update: Update, context: ContextTypes.DEFAULT_TYPE
 def _ensure_allowed(update: Update) -> bool:
     if not ALLOWED_CHAT_IDS:
         return True
-    chat_id = str(update.effective_chat.id)
+    chat_id = update.effective_chat.id
     if chat_id in ALLOWED_CHAT_IDS:
         return True
     logger.warning("Unauthorized access attempt from chat %s", chat_id)
@@ -656,191 +852,180 @@ def _ensure_allowed(update: Update) -> bool:
 
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    message = update.message
     if not _ensure_allowed(update):
-        await update.message.reply_text("Xin lỗi, bot này chỉ dành cho chủ sở hữu.")
+        await message.reply_text(_MSG_NOT_ALLOWED)
         return
-    event_types = ", ".join(cfg["label"] for cfg in SHIFT_CONFIG.values())
-    await update.message.reply_text(
+    await message.reply_text(
         f"Chào bạn! Gõ /{ENTRY_COMMAND} để tạo log mới (cũ: /newshift).\n"
-        f"Hỗ trợ các sự kiện: {event_types}.\n"
+        f"Hỗ trợ các sự kiện: {EVENT_TYPES_TEXT}.\n"
         "Trong quá trình nhập, gõ /cancel nếu muốn huỷ."
     )
 
 
 async def new_shift(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    message = update.message
     if not _ensure_allowed(update):
-        await update.message.reply_text("Xin lỗi, bot này chỉ dành cho chủ sở hữu.")
+        await message.reply_text(_MSG_NOT_ALLOWED)
         return ConversationHandler.END
     context.user_data["shift_form"] = {}
-    today = datetime.now().date()
-    tomorrow = today + timedelta(days=1)
-    yesterday = today - timedelta(days=1)
-    keyboard = [
-        [f"📆 Hôm nay ({today.strftime('%d/%m/%Y')})"],
-        [
-            f"⏭️ Ngày mai ({tomorrow.strftime('%d/%m/%Y')})",
-            f"⏮️ Hôm qua ({yesterday.strftime('%d/%m/%Y')})",
-        ],
-    ]
-    await update.message.reply_text(
+    await message.reply_text(
         "📅 Chọn ngày sự kiện (DD/MM/YYYY).\n"
         "Bạn có thể bấm phím nhanh hoặc nhập tay theo định dạng ngày/tháng/năm.",
-        reply_markup=ReplyKeyboardMarkup(
-            keyboard, one_time_keyboard=True, resize_keyboard=True
-        ),
+        reply_markup=_date_keyboard(_today()),
     )
     return ASK_DATE
 
 
 async def handle_date(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    event_date = _parse_event_date(update.message.text or "")
+    message = update.message
+    event_date = _parse_event_date(message.text or "")
     if not event_date:
-        await update.message.reply_text(
+        await message.reply_text(
             "Ngày không hợp lệ. Ví dụ hợp lệ: 12/06/2024 hoặc 2024-06-12."
         )
         return ASK_DATE
 
     context.user_data["shift_form"]["date"] = event_date
-    await update.message.reply_text(
+    await message.reply_text(
         "📍 Nhập tên quán/địa điểm (bấm Bee Night nếu đi show cố định):",
-        reply_markup=_default_venue_keyboard(),
+        reply_markup=VENUE_KEYBOARD,
     )
     return ASK_VENUE
 
 
+# (epoch of the next local midnight, today's date)
+_TODAY_CACHE: Optional[Tuple[float, date]] = None
+
+
+def _today() -> date:
+    """Local date, recomputed only once the cached day has ended."""
+    global _TODAY_CACHE
+    if _TODAY_CACHE is None or time.time() >= _TODAY_CACHE[0]:
+        today = datetime.now().date()
+        midnight = datetime.combine(today + timedelta(days=1), dt_time())
+        _TODAY_CACHE = (midnight.timestamp(), today)
+    return _TODAY_CACHE[1]
+
+
 def _parse_event_date(text: str) -> Optional[date]:
     raw = (text or "").strip()
     if not raw:
         return None
     normalized = raw.lower()
-    today = datetime.now().date()
-    relative_mapping = {
-        "hôm nay": 0,
-        "hom nay": 0,
-        "ngày mai": 1,
-        "ngay mai": 1,
-        "hôm qua": -1,
-        "hom qua": -1,
-    }
-    for key, delta in relative_mapping.items():
-        if normalized.startswith(key):
-            return today + timedelta(days=delta)
-
-    match = re.search(r"(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})", raw)
-    candidates = [match.group(1)] if match else []
-    candidates.append(raw)
-
-    for candidate in candidates:
-        clean = candidate.strip()
-        if not clean:
-            continue
-        normalized_candidate = clean.replace("-", "/")
-        for fmt in ("%d/%m/%Y", "%d/%m/%y"):
-            try:
-                parsed = datetime.strptime(normalized_candidate, fmt).date()
-                if fmt.endswith("%y") and parsed.year < 2000:
-                    parsed = parsed.replace(year=parsed.year + 2000)
-                return parsed
-            except ValueError:
-                continue
-        try:
-            return datetime.strptime(clean, "%Y-%m-%d").date()
-        except ValueError:
-            continue
-    return None
+    if normalized.startswith(_RELATIVE_DATE_PREFIXES):
+        key = next(key for key in _RELATIVE_DATE_PREFIXES if normalized.startswith(key))
+        return _today() + timedelta(days=_RELATIVE_DATE_MAP[key])
+
+    match = _YMD_RE.fullmatch(raw)
+    if match:
+        year, month, day = match.groups()
+    else:
+        match = _DMY_RE.search(raw)
+        if not match:
+            return None
+        day, month, year = match.groups()
+    year_number = int(year)
+    if len(year) == 2:
+        year_number += 2000
+    try:
+        return date(year_number, int(month), int(day))
+    except ValueError:
+        return None
+
+
+def _parse_clock(text: str) -> Optional[dt_time]:
+    match = _CLOCK_RE.fullmatch((text or "").strip())
+    if not match:
+        return None
+    try:
+        return dt_time(int(match.group(1)), int(match.group(2)))
+    except ValueError:
+        return None
+
+
+def _parse_payment(text: str) -> Optional[int]:
+    """Read "300k" / "300" / "300.000" as an allowed outsourced amount, or None."""
+    digits = _NON_DIGIT_RE.sub("", text)
+    if not digits:
+        return None
+    amount = int(digits) * (1000 if len(digits) <= 3 else 1)
+    return amount if amount in OUTSOURCED_PAY_SET else None
 
 
 async def handle_venue(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    venue = update.message.text.strip()
+    message = update.message
+    venue = message.text.strip()
     if not venue:
-        await update.message.reply_text("Tên địa điểm không được để trống.")
+        await message.reply_text("Tên địa điểm không được để trống.")
         return ASK_VENUE
 
     context.user_data["shift_form"]["venue"] = venue
-    keyboard = [[cfg["label"]] for cfg in SHIFT_CONFIG.values()]
-    await update.message.reply_text(
+    await message.reply_text(
         "🎟️ Chọn loại sự kiện:",
-        reply_markup=ReplyKeyboardMarkup(
-            keyboard, one_time_keyboard=True, resize_keyboard=True
-        ),
+        reply_markup=EVENT_KEYBOARD,
     )
     return ASK_EVENT
 
 
 async def handle_event(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    label_to_key = {cfg["label"]: key for key, cfg in SHIFT_CONFIG.items()}
-    chosen_label = update.message.text.strip()
-    if chosen_label not in label_to_key:
-        await update.message.reply_text("Loại sự kiện không hợp lệ, thử lại nhé.")
+    message = update.message
+    event_key = LABEL_TO_EVENT_KEY.get(message.text.strip())
+    if event_key is None:
+        await message.reply_text(_MSG_INVALID_EVENT)
         return ASK_EVENT
 
-    context.user_data["shift_form"]["event_type"] = label_to_key[chosen_label]
-    await update.message.reply_text(
+    context.user_data["shift_form"]["event_type"] = event_key
+    await message.reply_text(
         "👥 Ca này do ai phụ trách?",
-        reply_markup=ReplyKeyboardMarkup(
-            [["Trực tiếp", "Thuê người"]],
-            one_time_keyboard=True,
-            resize_keyboard=True,
-        ),
+        reply_markup=PERFORMER_KEYBOARD,
     )
     return ASK_PERFORMER
 
 
 async def handle_performer(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    text = (update.message.text or "").strip().lower()
-    normalized = text.replace("’", "'")
-    if any(keyword in normalized for keyword in ("trực tiếp", "tự làm", "toi truc", "tu lam", "tôi trực")):
-        performer = "self"
-    elif "thuê" in normalized or "thue" in normalized:
-        performer = "outsourced"
-    else:
-        await update.message.reply_text("Vui lòng chọn 'Trực tiếp' hoặc 'Thuê người'.")
+    message = update.message
+    performer = _parse_performer(_normalize_text(message.text or ""))
+    if performer is None:
+        await message.reply_text(_MSG_CHOOSE_PERFORMER)
         return ASK_PERFORMER
 
     context.user_data["shift_form"]["performed_by"] = performer
     if performer == "outsourced":
-        keyboard = [[f"{amount // 1000}k"] for amount in OUTSOURCED_PAY_CHOICES]
-        await update.message.reply_text(
+        await message.reply_text(
             "💵 Chọn số tiền bạn sẽ trả cho người được thuê:",
-            reply_markup=ReplyKeyboardMarkup(
-                keyboard, one_time_keyboard=True, resize_keyboard=True
-            ),
+            reply_markup=PAYMENT_KEYBOARD,
         )
         return ASK_PAYMENT
 
     context.user_data["shift_form"]["worker_payment"] = 0
-    await update.message.reply_text(
+    await message.reply_text(
         "⏰ Giờ kết thúc thực tế (HH:MM, ví dụ 23:45):",
-        reply_markup=ReplyKeyboardRemove(),
+        reply_markup=REMOVE_KEYBOARD,
     )
     return ASK_END_TIME
 
 
 async def handle_payment(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    raw = (update.message.text or "").lower()
-    digits = "".join(ch for ch in raw if ch.isdigit())
-    try:
-        amount = int(digits) * (1000 if len(digits) <= 3 else 1)
-    except ValueError:
-        amount = -1
-    if amount not in OUTSOURCED_PAY_CHOICES:
-        pretty = ", ".join(f"{val // 1000}k" for val in OUTSOURCED_PAY_CHOICES)
-        await update.message.reply_text(f"Vui lòng chọn một trong các mức: {pretty}")
+    message = update.message
+    amount = _parse_payment(message.text or "")
+    if amount is None:
+        await message.reply_text(f"Vui lòng chọn một trong các mức: {PAYMENT_CHOICES_TEXT}")
         return ASK_PAYMENT
 
     context.user_data["shift_form"]["worker_payment"] = amount
-    await update.message.reply_text(
+    await message.reply_text(
         "⏰ Giờ kết thúc thực tế (HH:MM, ví dụ 23:45):",
-        reply_markup=ReplyKeyboardRemove(),
+        reply_markup=REMOVE_KEYBOARD,
     )
     return ASK_END_TIME
 
 
 async def handle_end_time(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    try:
-        end_time = datetime.strptime(update.message.text.strip(), "%H:%M").time()
-    except ValueError:
-        await update.message.reply_text("Giờ không hợp lệ. Ví dụ hợp lệ: 23:10")
+    message = update.message
+    end_time = _parse_clock(message.text)
+    if end_time is None:
+        await message.reply_text(_MSG_INVALID_TIME)
         return ASK_END_TIME
 
     form = context.user_data.get("shift_form", {})
@@ -853,87 +1038,105 @@ async def handle_end_time(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         worker_payment=form.get("worker_payment", 0),
     )
 
-    await update.message.reply_text("Đang lưu dữ liệu, vui lòng chờ... ⏳")
     try:
-        computed = payload.compute()
-        await asyncio.to_thread(GITHUB_CLIENT.append_row, CSV_HEADER, computed)
+        computed = payload.computed
+        await _with_ack(
+            message, "Đang lưu dữ liệu, vui lòng chờ... ⏳", GITHUB_CLIENT.append_row(CSV_HEADER, computed)
+        )
     except Exception as exc:  # pragma: no cover - network code
         logger.exception("Không thể lưu dữ liệu: %s", exc)
-        await update.message.reply_text("Có lỗi khi ghi dữ liệu lên GitHub, thử lại sau nhé.")
+        await message.reply_text("Có lỗi khi ghi dữ liệu lên GitHub, thử lại sau nhé.")
         return ConversationHandler.END
+    finally:
+        _invalidate_rows_cache()
 
     context.user_data["last_saved_row"] = computed
-    await update.message.reply_text(payload.summary)
-    await update.message.reply_text(
-        "Bạn muốn làm gì tiếp theo?", reply_markup=_post_save_keyboard()
+    await message.reply_text(payload.summary)
+    await message.reply_text(
+        "Bạn muốn làm gì tiếp theo?", reply_markup=POST_SAVE_KEYBOARD
     )
     context.user_data.pop("shift_form", None)
     return ASK_NEXT_ACTION
 
 
 async def handle_next_action(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    text = (update.message.text or "").strip().lower()
-    if "hoàn tác" in text or "hoan tac" in text:
+    message = update.message
+    action = _lookup_choice(
+        _normalize_text(message.text or ""), _NEXT_ACTION_BY_LABEL, _NEXT_ACTION_KEYWORDS
+    )
+    if action == "undo":
         last_saved = context.user_data.get("last_saved_row")
         if not last_saved:
-            await update.message.reply_text(
+            await message.reply_text(
                 "Không có ca vừa lưu để hoàn tác.",
-                reply_markup=_post_save_keyboard(),
+                reply_markup=POST_SAVE_KEYBOARD,
             )
             return ASK_NEXT_ACTION
-        await update.message.reply_text("Đang hoàn tác ca vừa lưu, vui lòng chờ... ⏳")
         try:
-            deleted = await asyncio.to_thread(
-                GITHUB_CLIENT.delete_matching_row,
-                last_saved,
+            deleted = await _with_ack(
+                message,
+                "Đang hoàn tác ca vừa lưu, vui lòng chờ... ⏳",
+                GITHUB_CLIENT.delete_matching_row(last_saved),
             )
         except Exception as exc:  # pragma: no cover - network code
             logger.exception("Không thể hoàn tác dữ liệu: %s", exc)
-            await update.message.reply_text(
+            await message.reply_text(
                 "Có lỗi khi hoàn tác dữ liệu trên GitHub, thử lại sau nhé.",
-                reply_markup=_post_save_keyboard(),
+                reply_markup=POST_SAVE_KEYBOARD,
             )
             return ASK_NEXT_ACTION
+        finally:
+            _invalidate_rows_cache()
         if deleted:
             context.user_data.pop("last_saved_row", None)
-            await update.message.reply_text(
+            await message.reply_text(
                 "✅ Đã hoàn tác ca vừa lưu.",
-                reply_markup=_post_save_keyboard(),
+                reply_markup=POST_SAVE_KEYBOARD,
             )
             return ASK_NEXT_ACTION
-        await update.message.reply_text(
+        await message.reply_text(
             "Không tìm thấy dòng vừa lưu để hoàn tác (có thể file đã thay đổi). "
             "Bạn có thể dùng /ds để xoá thủ công.",
-            reply_markup=_post_save_keyboard(),
+            reply_markup=POST_SAVE_KEYBOARD,
         )
         return ASK_NEXT_ACTION
-    if "nhập" in text or "nhap" in text:
+    if action == "new":
         return await new_shift(update, context)
-    if "kết thúc" in text or "ket thuc" in text or "kết thuc" in text:
-        await update.message.reply_text(
+    if action == "finish":
+        await message.reply_text(
             "🏁 Đã kết thúc phiên nhập liệu. Nghỉ ngơi thôi!",
-            reply_markup=ReplyKeyboardRemove(),
+            reply_markup=REMOVE_KEYBOARD,
         )
         return ConversationHandler.END
-    await update.message.reply_text(
+    await message.reply_text(
         "Vui lòng chọn 'Nhập ca mới' hoặc 'Kết thúc'.",
-        reply_markup=_post_save_keyboard(),
+        reply_markup=POST_SAVE_KEYBOARD,
     )
     return ASK_NEXT_ACTION
 
 
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    message = update.message
     context.user_data.pop("shift_form", None)
     context.user_data.pop("ds_session", None)
-    await update.message.reply_text(
+    await message.reply_text(
         "Đã huỷ. Bạn có thể nhập lại bằng /ca hoặc quản lý bằng /ds.",
-        reply_markup=ReplyKeyboardRemove(),
+        reply_markup=REMOVE_KEYBOARD,
     )
     return ConversationHandler.END
 
 
+async def _post_shutdown(application: Application) -> None:
+    await GITHUB_CLIENT.aclose()
+
+
 def main() -> None:
-    application = ApplicationBuilder().token(TELEGRAM_TOKEN).build()
+    application = (
+        ApplicationBuilder()
+        .token(TELEGRAM_TOKEN)
+        .post_shutdown(_post_shutdown)
+        .build()
+    )
     ds_handler = ConversationHandler(
         entry_points=[CommandHandler("ds", ds_start)],
         states={
@@ -984,8 +1187,21 @@ def main() -> None:
     application.add_handler(CommandHandler("start", start))
     application.add_handler(ds_handler)
     application.add_handler(conv_handler)
+    if TELEGRAM_WEBHOOK_URL:
+        # Telegram pushes updates to us; the local listener serves the URL's path.
+        logger.info("Bot started with webhook %s ...", TELEGRAM_WEBHOOK_URL)
+        application.run_webhook(
+            listen="0.0.0.0",
+            port=int(os.environ.get("PORT", "8443")),
+            url_path=urlparse(TELEGRAM_WEBHOOK_URL).path.lstrip("/"),
+            webhook_url=TELEGRAM_WEBHOOK_URL,
+            secret_token=os.environ.get("TELEGRAM_WEBHOOK_SECRET") or None,
+            close_loop=False,
+        )
+        return
     logger.info("Bot started and polling ...")
-    application.run_polling(close_loop=False)
+    # Long-poll for up to 30 s per getUpdates so an idle bot rarely reconnects.
+    application.run_polling(timeout=30, close_loop=False)
 
 
 if __name__ == "__main__":
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import cached_property, lru_cache
 from datetime import date, datetime, time, timedelta
 from typing import Dict, Tuple
 
 # Lương giờ cơ bản: 200.000đ/giờ. Base pay của mỗi ca = số giờ dự kiến × lương giờ.
 HOURLY_PAY = 200_000
 # OT = 150% lương giờ, tính theo phút chính xác (không làm tròn).
-OT_RATE_PER_MINUTE = HOURLY_PAY * 1.5 / 60  # = 5.000đ/phút
+OT_RATE_PER_MINUTE = HOURLY_PAY * 3 // (2 * 60)  # = 5.000đ/phút, số nguyên
 
 SHIFT_CONFIG = {
     "dem_nhac": {
@@ -24,6 +25,12 @@ SHIFT_CONFIG = {
     },
 }
 
+# HH:MM strings of each shift's start / scheduled end, formatted once.
+_SCHEDULE_LABELS = {
+    key: (cfg["start_time"].strftime("%H:%M"), cfg["scheduled_end"].strftime("%H:%M"))
+    for key, cfg in SHIFT_CONFIG.items()
+}
+
 OUTSOURCED_PAY_CHOICES = (300_000, 500_000, 600_000)
 
 CSV_HEADER = [
@@ -54,15 +61,15 @@ class ShiftPayload:
 
     def compute(self) -> Dict[str, str]:
         cfg = SHIFT_CONFIG[self.event_type]
-        scheduled_start_dt = datetime.combine(self.date, cfg["start_time"])
-        scheduled_end_dt = datetime.combine(self.date, cfg["scheduled_end"])
+        scheduled_start_dt, scheduled_end_dt = _sched_bounds(self.date, self.event_type)
+        start_label, scheduled_end_label = _SCHEDULE_LABELS[self.event_type]
         actual_end_dt = datetime.combine(self.date, self.actual_end_time)
         if actual_end_dt < scheduled_start_dt:
             actual_end_dt += timedelta(days=1)
 
         base_pay = cfg["base_pay"]
-        ot_minutes = _calculate_ot_minutes(scheduled_end_dt, actual_end_dt)
-        ot_pay = _calculate_ot_pay(ot_minutes)
+        ot_minutes = calculate_ot_minutes(scheduled_end_dt, actual_end_dt)
+        ot_pay = calculate_ot_pay(ot_minutes)
         total_pay = base_pay + ot_pay
         worker_payment = self.worker_payment if self.performed_by == "outsourced" else 0
         net_income = total_pay - worker_payment
@@ -71,8 +78,8 @@ class ShiftPayload:
             "venue": self.venue,
             "event_type": cfg["label"],
             "performed_by": "Tự làm" if self.performed_by == "self" else "Thuê ngoài",
-            "start_time": cfg["start_time"].strftime("%H:%M"),
-            "scheduled_end_time": cfg["scheduled_end"].strftime("%H:%M"),
+            "start_time": start_label,
+            "scheduled_end_time": scheduled_end_label,
             "actual_end_time": actual_end_dt.strftime("%H:%M"),
             "base_pay": f"{base_pay:.0f}",
             "ot_minutes": str(ot_minutes),
@@ -82,9 +89,14 @@ class ShiftPayload:
             "net_income": f"{net_income:.0f}",
         }
 
+    @cached_property
+    def computed(self) -> Dict[str, str]:
+        """Result of compute(), evaluated once per payload."""
+        return self.compute()
+
     @property
     def summary(self) -> str:
-        computed = self.compute()
+        computed = self.computed
         return (
             "💾 Đã lưu!\n"
             f"🗓️ {computed['date']} – {computed['event_type']} tại {computed['venue']}\n"
@@ -93,18 +105,34 @@ class ShiftPayload:
         )
 
 
-def _calculate_ot_minutes(scheduled_end: datetime, actual_end: datetime) -> int:
+@lru_cache(maxsize=1024)
+def _sched_bounds(day: date, event_type: str) -> Tuple[datetime, datetime]:
+    """Scheduled start and end datetimes of an event type on `day`."""
+    cfg = SHIFT_CONFIG[event_type]
+    return datetime.combine(day, cfg["start_time"]), datetime.combine(day, cfg["scheduled_end"])
+
+
+def calculate_ot_minutes(scheduled_end: datetime, actual_end: datetime) -> int:
+    """Whole minutes worked past `scheduled_end` (0 when the shift ended on time)."""
     if actual_end <= scheduled_end:
         return 0
-    diff_seconds = (actual_end - scheduled_end).total_seconds()
-    return int(round(diff_seconds / 60))
+    # Integer seconds rounded to the nearest minute (inputs are whole HH:MM anyway).
+    diff = actual_end - scheduled_end
+    return (diff.days * 86_400 + diff.seconds + 30) // 60
 
 
-def _calculate_ot_pay(ot_minutes: int) -> int:
+def calculate_ot_pay(ot_minutes: int) -> int:
+    """OT pay for `ot_minutes`, billed per minute at OT_RATE_PER_MINUTE."""
     if ot_minutes <= 0:
         return 0
-    return int(round(ot_minutes * OT_RATE_PER_MINUTE))
+    return ot_minutes * OT_RATE_PER_MINUTE
+
+
+_AVAILABLE_EVENT_TYPES = {
+    key: (cfg["label"], _SCHEDULE_LABELS[key][0]) for key, cfg in SHIFT_CONFIG.items()
+}
 
 
 def available_event_types() -> Dict[str, Tuple[str, str]]:
-    return {key: (cfg["label"], cfg["start_time"].strftime("%H:%M")) for key, cfg in SHIFT_CONFIG.items()}
+    """Event key -> (label, HH:MM start). Shared; do not mutate."""
+    return _AVAILABLE_EVENT_TYPES
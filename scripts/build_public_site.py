@@ -33,6 +33,19 @@ FORBIDDEN_IN_PAGES = [
 
 
 def copy_file(source: Path, destination: Path) -> None:
+    # copy2 preserves mtime, so an earlier copy of an unchanged source matches on
+    # both size and mtime and can be left as is.
+    source_stat = source.stat()
+    try:
+        dest_stat = destination.stat()
+    except FileNotFoundError:
+        pass
+    else:
+        if (
+            dest_stat.st_size == source_stat.st_size
+            and dest_stat.st_mtime_ns == source_stat.st_mtime_ns
+        ):
+            return
     destination.parent.mkdir(parents=True, exist_ok=True)
     shutil.copy2(source, destination)
 
@@ -4,6 +4,7 @@
 from __future__ import annotations
 
 import csv
+from operator import itemgetter
 from pathlib import Path
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
@@ -25,15 +26,28 @@ def main() -> None:
     if not SOURCE.exists():
         raise SystemExit(f"Source file not found: {SOURCE}")
 
-    with SOURCE.open("r", encoding="utf-8") as src, DESTINATION.open("w", encoding="utf-8", newline="") as dst:
-        reader = csv.DictReader(src)
-        writer = csv.DictWriter(dst, fieldnames=PUBLIC_COLUMNS)
-        writer.writeheader()
-        for row in reader:
-            if not row.get("date"):
-                continue
-            sanitized = {column: row.get(column, "") for column in PUBLIC_COLUMNS}
-            writer.writerow(sanitized)
+    with SOURCE.open("r", encoding="utf-8", newline="") as src, DESTINATION.open("w", encoding="utf-8", newline="") as dst:
+        reader = csv.reader(src)
+        writer = csv.writer(dst)
+        writer.writerow(PUBLIC_COLUMNS)
+        header = next(reader, [])
+        if "date" in header:
+            # Project each row by position instead of building a dict per row.
+            # Rows are trimmed to the header and padded, so columns missing from the
+            # source point one past the end and always read as "".
+            width = len(header)
+            positions = [
+                header.index(column) if column in header else width for column in PUBLIC_COLUMNS
+            ]
+            date_index = header.index("date")
+            span = width + 1
+            project = itemgetter(*positions)
+            for values in reader:
+                del values[width:]
+                values.extend([""] * (span - len(values)))
+                if not values[date_index]:
+                    continue
+                writer.writerow(project(values))
 
     print(f"Wrote sanitized data to {DESTINATION.relative_to(REPO_ROOT)}")
 
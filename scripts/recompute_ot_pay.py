@@ -20,30 +20,41 @@ Columns được cập nhật:
 from __future__ import annotations
 
 import csv
+import os
+import shutil
+import sys
+import tempfile
 from datetime import date, datetime, timedelta
 from pathlib import Path
+from typing import TextIO
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
+# Dùng chung rule lương/OT với bot thay vì chép lại hằng số.
+sys.path.insert(0, str(REPO_ROOT / "bot"))
+
+from payroll import SHIFT_CONFIG, calculate_ot_minutes, calculate_ot_pay  # noqa: E402
+
 SOURCE = REPO_ROOT / "data" / "shifts.csv"
+_IO_BUFFER_SIZE = 1 << 20
 
 # Rule mới áp dụng từ ngày này (gồm). Trước ngày này: giữ nguyên.
 NEW_RULE_FROM_DATE = date(2026, 7, 1)
 
-# Lương giờ cơ bản & OT rate (phải khớp với bot/payroll.py).
-HOURLY_PAY = 200_000
-OT_RATE_PER_MINUTE = HOURLY_PAY * 1.5 / 60  # = 5.000đ/phút
-
-# Cấu hình giờ theo loại ca (label trong CSV). Phải khớp với bot/payroll.py.
-EVENT_TIME_CONFIG = {
-    "Đêm nhạc": {"start": "19:30", "scheduled_end": "23:00"},
-    "Openmic": {"start": "20:00", "scheduled_end": "22:30"},
+# Giờ ca theo label trong CSV: (start, scheduled_end, scheduled_end dạng HH:MM),
+# lấy từ SHIFT_CONFIG của bot/payroll.py để hai nơi không lệch nhau.
+_EVENT_TIMES = {
+    cfg["label"]: (cfg["start_time"], cfg["scheduled_end"], cfg["scheduled_end"].strftime("%H:%M"))
+    for cfg in SHIFT_CONFIG.values()
 }
 
 
 def _parse_int(value: str, default: int = 0) -> int:
-    if value is None:
+    if not value:
         return default
-    text = str(value).strip()
+    text = value.strip()
+    # Fast path: plain digits, as written by the bot.
+    if text.isdecimal():
+        return int(text)
     if not text:
         return default
     normalized = "".join(ch for ch in text if ch.isdigit() or ch == "-")
@@ -71,116 +82,32 @@ def _time_on(date_obj: date, hhmm: str) -> datetime:
     return datetime.combine(date_obj, t)
 
 
-def _calculate_ot_minutes(scheduled_end: datetime, actual_end: datetime) -> int:
-    if actual_end <= scheduled_end:
-        return 0
-    diff_seconds = (actual_end - scheduled_end).total_seconds()
-    return int(round(diff_seconds / 60))
-
-
-def _calculate_ot_pay(ot_minutes: int) -> int:
-    if ot_minutes <= 0:
-        return 0
-    return int(round(ot_minutes * OT_RATE_PER_MINUTE))
-
-
 def main() -> None:
     if not SOURCE.exists():
         raise SystemExit(f"Source file not found: {SOURCE}")
 
-    with SOURCE.open("r", encoding="utf-8", newline="") as src:
-        reader = csv.DictReader(src)
-        fieldnames = reader.fieldnames
-        if not fieldnames:
-            raise SystemExit("CSV header is missing.")
-
-        required_columns = {
-            "date",
-            "event_type",
-            "actual_end_time",
-            "base_pay",
-            "ot_minutes",
-            "ot_pay",
-            "total_pay",
-            "worker_payment",
-            "net_income",
-        }
-        missing_columns = required_columns.difference(fieldnames)
-        if missing_columns:
-            joined = ", ".join(sorted(missing_columns))
-            raise SystemExit(f"Missing required column(s) in shifts.csv: {joined}")
-
-        rows: list[dict[str, str]] = []
-        changed = 0
-        skipped_old = 0
-        skipped_unknown_event = 0
-
-        for row in reader:
-            if not row.get("date"):
-                continue
-
-            row_date = _parse_date(row.get("date", ""))
-            if row_date is None:
-                rows.append(row)
-                continue
-
-            # Chỉ recompute dòng từ NEW_RULE_FROM_DATE trở đi.
-            if row_date < NEW_RULE_FROM_DATE:
-                skipped_old += 1
-                rows.append(row)
-                continue
-
-            event_label = (row.get("event_type") or "").strip()
-            event_cfg = EVENT_TIME_CONFIG.get(event_label)
-            if event_cfg is None:
-                skipped_unknown_event += 1
-                rows.append(row)
-                continue
-
-            actual_end_str = (row.get("actual_end_time") or "").strip()
-            if not actual_end_str:
-                rows.append(row)
-                continue
-
-            scheduled_end_str = event_cfg["scheduled_end"]
-            start_dt = _time_on(row_date, event_cfg["start"])
-            scheduled_end_dt = _time_on(row_date, scheduled_end_str)
-            actual_end_dt = _time_on(row_date, actual_end_str)
-            # Xử lý qua đêm: chỉ cộng 1 ngày khi actual_end sớm hơn start_time
-            # (tức ca kéo dài qua nửa đêm). Tránh nhầm ca kết thúc sớm hơn
-            # scheduled_end (vd 22:42 < 23:00) với ca qua ngày.
-            if actual_end_dt < start_dt:
-                actual_end_dt = datetime.combine(
-                    row_date + timedelta(days=1),
-                    actual_end_dt.time(),
-                )
-
-            base_pay = _parse_int(row.get("base_pay", "0"))
-            worker_payment = _parse_int(row.get("worker_payment", "0"))
-
-            ot_minutes = _calculate_ot_minutes(scheduled_end_dt, actual_end_dt)
-            ot_pay = _calculate_ot_pay(ot_minutes)
-            total_pay = base_pay + ot_pay
-            net_income = total_pay - worker_payment
-
-            new_vals = {
-                "scheduled_end_time": scheduled_end_str,
-                "ot_minutes": str(ot_minutes),
-                "ot_pay": str(ot_pay),
-                "total_pay": str(total_pay),
-                "net_income": str(net_income),
-            }
-
-            if any(row.get(k, "") != v for k, v in new_vals.items()):
-                row.update(new_vals)
-                changed += 1
-
-            rows.append(row)
-
-    with SOURCE.open("w", encoding="utf-8", newline="") as dst:
-        writer = csv.DictWriter(dst, fieldnames=fieldnames, lineterminator="\n")
-        writer.writeheader()
-        writer.writerows(rows)
+    # Rows are streamed into a temp file next to the source, which then atomically
+    # replaces it; the whole CSV is never held in memory.
+    with SOURCE.open("r", encoding="utf-8", newline="", buffering=_IO_BUFFER_SIZE) as src:
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            newline="",
+            buffering=_IO_BUFFER_SIZE,
+            dir=SOURCE.parent,
+            prefix=f".{SOURCE.name}.",
+            suffix=".tmp",
+            delete=False,
+        ) as dst:
+            try:
+                changed, skipped_old, skipped_unknown_event = _recompute(src, dst)
+            except BaseException:
+                dst.close()
+                os.unlink(dst.name)
+                raise
+    # NamedTemporaryFile creates the file 0600; keep the original permissions.
+    shutil.copymode(SOURCE, dst.name)
+    os.replace(dst.name, SOURCE)
 
     print(f"Updated {changed} row(s) in {SOURCE.relative_to(REPO_ROOT)}")
     print(f"Skipped {skipped_old} row(s) before {NEW_RULE_FROM_DATE} (kept old rule)")
@@ -188,5 +115,102 @@ def main() -> None:
         print(f"Skipped {skipped_unknown_event} row(s) with unknown event_type")
 
 
+def _recompute(src: TextIO, dst: TextIO) -> tuple[int, int, int]:
+    """Copy rows from src to dst, recomputing OT on the way.
+
+    Returns (changed, skipped_old, skipped_unknown_event).
+    """
+    reader = csv.DictReader(src)
+    fieldnames = reader.fieldnames
+    if not fieldnames:
+        raise SystemExit("CSV header is missing.")
+
+    required_columns = {
+        "date",
+        "event_type",
+        "actual_end_time",
+        "base_pay",
+        "ot_minutes",
+        "ot_pay",
+        "total_pay",
+        "worker_payment",
+        "net_income",
+    }
+    missing_columns = required_columns.difference(fieldnames)
+    if missing_columns:
+        joined = ", ".join(sorted(missing_columns))
+        raise SystemExit(f"Missing required column(s) in shifts.csv: {joined}")
+
+    writer = csv.DictWriter(dst, fieldnames=fieldnames, lineterminator="\n")
+    writer.writeheader()
+    changed = 0
+    skipped_old = 0
+    skipped_unknown_event = 0
+
+    for row in reader:
+        if not row.get("date"):
+            continue
+
+        row_date = _parse_date(row.get("date", ""))
+        if row_date is None:
+            writer.writerow(row)
+            continue
+
+        # Chỉ recompute dòng từ NEW_RULE_FROM_DATE trở đi.
+        if row_date < NEW_RULE_FROM_DATE:
+            skipped_old += 1
+            writer.writerow(row)
+            continue
+
+        event_label = (row.get("event_type") or "").strip()
+        event_times = _EVENT_TIMES.get(event_label)
+        if event_times is None:
+            skipped_unknown_event += 1
+            writer.writerow(row)
+            continue
+
+        actual_end_str = (row.get("actual_end_time") or "").strip()
+        if not actual_end_str:
+            writer.writerow(row)
+            continue
+
+        start_time, scheduled_end_time, scheduled_end_str = event_times
+        start_dt = datetime.combine(row_date, start_time)
+        scheduled_end_dt = datetime.combine(row_date, scheduled_end_time)
+        actual_end_dt = _time_on(row_date, actual_end_str)
+        # Xử lý qua đêm: chỉ cộng 1 ngày khi actual_end sớm hơn start_time
+        # (tức ca kéo dài qua nửa đêm). Tránh nhầm ca kết thúc sớm hơn
+        # scheduled_end (vd 22:42 < 23:00) với ca qua ngày.
+        if actual_end_dt < start_dt:
+            actual_end_dt = datetime.combine(
+                row_date + timedelta(days=1),
+                actual_end_dt.time(),
+            )
+
+        base_pay = _parse_int(row.get("base_pay", "0"))
+        worker_payment = _parse_int(row.get("worker_payment", "0"))
+
+        ot_minutes = calculate_ot_minutes(scheduled_end_dt, actual_end_dt)
+        ot_pay = calculate_ot_pay(ot_minutes)
+        total_pay = base_pay + ot_pay
+        net_income = total_pay - worker_payment
+
+        new_vals = {
+            "scheduled_end_time": scheduled_end_str,
+            "ot_minutes": str(ot_minutes),
+            "ot_pay": str(ot_pay),
+            "total_pay": str(total_pay),
+            "net_income": str(net_income),
+        }
+
+        if any(row.get(k, "") != v for k, v in new_vals.items()):
+            row.update(new_vals)
+            changed += 1
+
+        writer.writerow(row)
+
+    return changed, skipped_old, skipped_unknown_event
+
+
 if __name__ == "__main__":
     main()
@@ -3,11 +3,12 @@
 
 from __future__ import annotations
 
-import base64
+import hashlib
+import json
 import os
 from pathlib import Path
 
-import requests
+import httpx
 
 try:
     from dotenv import load_dotenv
@@ -28,6 +29,30 @@ def load_env() -> None:
             break
 
 
+def _state_path(destination: Path) -> Path:
+    return destination.with_name(f".{destination.name}.sync.json")
+
+
+def _git_blob_sha(path: Path) -> str | None:
+    """SHA GitHub reports for `path`'s content (a git blob hash), or None if missing."""
+    try:
+        content = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def _load_etag(destination: Path) -> str | None:
+    """ETag of the last sync, provided the local file still holds that version."""
+    try:
+        state = json.loads(_state_path(destination).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+    if not state.get("etag") or state.get("sha") != _git_blob_sha(destination):
+        return None
+    return state["etag"]
+
+
 def main() -> None:
     load_env()
     token = os.environ.get("GITHUB_TOKEN")
@@ -39,19 +64,29 @@ def main() -> None:
         raise SystemExit("Missing GITHUB_TOKEN or GITHUB_REPO environment variables.")
 
     url = f"https://api.github.com/repos/{repo}/contents/{file_path}"
+    # The raw media type returns the file body itself instead of JSON wrapping a
+    # base64 copy of it, and works for private repos with the same token.
     headers = {
         "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github+json",
+        "Accept": "application/vnd.github.raw",
     }
     params = {"ref": branch}
-    response = requests.get(url, headers=headers, params=params, timeout=30)
+    destination = REPO_ROOT / file_path
+    etag = _load_etag(destination)
+    if etag:
+        headers["If-None-Match"] = etag
+    response = httpx.get(url, headers=headers, params=params, timeout=30)
+    if response.status_code == 304:
+        print(f"{file_path} đã là bản mới nhất, không cần tải lại.")
+        return
     response.raise_for_status()
-    data = response.json()
-    content = base64.b64decode(data["content"])
+    content = response.content
 
-    destination = REPO_ROOT / file_path
     destination.parent.mkdir(parents=True, exist_ok=True)
     destination.write_bytes(content)
+    if response.headers.get("ETag"):
+        state = {"etag": response.headers["ETag"], "sha": _git_blob_sha(destination)}
+        _state_path(destination).write_text(json.dumps(state), encoding="utf-8")
     print(f"Đã đồng bộ {file_path} từ GitHub → {destination}")
 
 